@@ -0,0 +1,26 @@
+"""events updated_at
+
+Revision ID: 0d6a3b91c8e4
+Revises: e2a94b7c3f58
+Create Date: 2026-10-18 12:02:31.664018+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0d6a3b91c8e4'
+down_revision: Union[str, None] = 'e2a94b7c3f58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("events", sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column("events", "updated_at")
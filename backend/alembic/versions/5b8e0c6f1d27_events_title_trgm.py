@@ -0,0 +1,34 @@
+"""events title trigram index
+
+Revision ID: 5b8e0c6f1d27
+Revises: c7d2f19a4e03
+Create Date: 2026-10-18 10:41:05.207631+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8e0c6f1d27'
+down_revision: Union[str, None] = 'c7d2f19a4e03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # GIN по триграммам обслуживает и ILIKE '%tok%', и word_similarity
+    op.create_index(
+        "idx_events_title_trgm",
+        "events",
+        ["title"],
+        postgresql_using="gin",
+        postgresql_ops={"title": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_events_title_trgm", table_name="events")
@@ -0,0 +1,40 @@
+"""events lat/lon + geo_cell grid index
+
+Revision ID: 7f3c5e8a2b61
+Revises: 0d6a3b91c8e4
+Create Date: 2026-10-18 12:48:09.317254+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7f3c5e8a2b61'
+down_revision: Union[str, None] = '0d6a3b91c8e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# ячейки 0.05°, 7200 ячеек в ряду — см. app/services/geo.py
+GEO_CELL_SQL = "floor((lat + 90) / 0.05)::bigint * 7200 + floor((lon + 180) / 0.05)::bigint"
+
+
+def upgrade() -> None:
+    op.add_column("events", sa.Column("lat", sa.Double(), nullable=True))
+    op.add_column("events", sa.Column("lon", sa.Double(), nullable=True))
+    op.add_column("events", sa.Column("geo_cell", sa.BigInteger(), sa.Computed(GEO_CELL_SQL, persisted=True), nullable=True))
+    op.create_index(
+        "idx_events_geo_cell_date",
+        "events",
+        ["geo_cell", "date_time"],
+        postgresql_where=sa.text("geo_cell IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_events_geo_cell_date", table_name="events")
+    op.drop_column("events", "geo_cell")
+    op.drop_column("events", "lon")
+    op.drop_column("events", "lat")
@@ -0,0 +1,32 @@
+"""events partial index for pending past transitions
+
+Revision ID: 9a1d4c27e5b3
+Revises: 7f3c5e8a2b61
+Create Date: 2026-10-18 13:37:44.902116+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a1d4c27e5b3'
+down_revision: Union[str, None] = '7f3c5e8a2b61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # очередь переходов в past: min(date_time) и UPDATE ... WHERE date_time <= now() идут по нему
+    op.create_index(
+        "idx_events_pending_past",
+        "events",
+        ["date_time"],
+        postgresql_where=sa.text("status <> 'past'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_events_pending_past", table_name="events")
@@ -0,0 +1,26 @@
+"""events keyset index
+
+Revision ID: a41c7e2d9b10
+Revises: 3e0114b63762
+Create Date: 2026-10-18 09:12:40.118204+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41c7e2d9b10'
+down_revision: Union[str, None] = '3e0114b63762'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("idx_events_date_id", "events", ["date_time", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("idx_events_date_id", table_name="events")
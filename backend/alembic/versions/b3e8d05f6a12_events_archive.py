@@ -0,0 +1,85 @@
+"""events/participants archive tables
+
+Revision ID: b3e8d05f6a12
+Revises: 9a1d4c27e5b3
+Create Date: 2026-10-18 14:05:12.618430+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e8d05f6a12'
+down_revision: Union[str, None] = '9a1d4c27e5b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # типы уже есть — переиспользуем
+    gender = postgresql.ENUM(name="gender_restriction", create_type=False)
+    event_status = postgresql.ENUM(name="event_status", create_type=False)
+    participant_status = postgresql.ENUM(name="participant_status", create_type=False)
+
+    op.create_table(
+        "events_archive",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=False),
+        sa.Column("creator_id", sa.BigInteger(), sa.ForeignKey("users.id", ondelete="SET NULL"), nullable=True),
+        sa.Column("title", sa.Text(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("location", sa.Text(), nullable=False),
+        sa.Column("city", sa.Text(), nullable=False),
+        sa.Column("date_time", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("lat", sa.Double(), nullable=True),
+        sa.Column("lon", sa.Double(), nullable=True),
+        sa.Column("gender_restriction", gender, nullable=False),
+        sa.Column("max_participants", sa.Integer(), nullable=True),
+        sa.Column("joined_count", sa.Integer(), nullable=False),
+        sa.Column("status", event_status, nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("archived_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("photo_url", sa.Text(), nullable=True),
+    )
+    op.create_index("idx_events_archive_date", "events_archive", ["date_time"])
+
+    op.create_table(
+        "event_participants_archive",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=False),
+        sa.Column("event_id", sa.BigInteger(), sa.ForeignKey("events_archive.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("user_id", sa.BigInteger(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("is_visible", sa.Boolean(), nullable=False),
+        sa.Column("status", participant_status, nullable=False),
+        sa.Column("joined_at", sa.DateTime(timezone=True), nullable=False),
+        sa.UniqueConstraint("event_id", "user_id", name="uq_event_user_archive"),
+    )
+    op.create_index("idx_epa_user", "event_participants_archive", ["user_id"])
+
+
+def downgrade() -> None:
+    # вернуть архив в горячие таблицы до удаления
+    op.execute(
+        """
+        INSERT INTO events (id, creator_id, title, description, location, city, date_time, lat, lon,
+                            gender_restriction, max_participants, joined_count, status, created_at,
+                            updated_at, photo_url)
+        SELECT id, creator_id, title, description, location, city, date_time, lat, lon,
+               gender_restriction, max_participants, joined_count, status, created_at,
+               updated_at, photo_url
+        FROM events_archive
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO event_participants (id, event_id, user_id, is_visible, status, joined_at)
+        SELECT id, event_id, user_id, is_visible, status, joined_at FROM event_participants_archive
+        """
+    )
+    op.drop_index("idx_epa_user", table_name="event_participants_archive")
+    op.drop_table("event_participants_archive")
+    op.drop_index("idx_events_archive_date", table_name="events_archive")
+    op.drop_table("events_archive")
@@ -0,0 +1,69 @@
+"""co_attendance graph + events.pairs_counted_at
+
+Revision ID: c4f1a7b2d9e6
+Revises: b3e8d05f6a12
+Create Date: 2026-10-18 14:41:27.305918+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f1a7b2d9e6'
+down_revision: Union[str, None] = 'b3e8d05f6a12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("events", sa.Column("pairs_counted_at", sa.DateTime(timezone=True), nullable=True))
+    # очередь record_past_events
+    op.create_index(
+        "idx_events_pairs_pending",
+        "events",
+        ["id"],
+        postgresql_where=sa.text("status = 'past' AND pairs_counted_at IS NULL"),
+    )
+
+    op.create_table(
+        "co_attendance",
+        sa.Column("user_id", sa.BigInteger(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("other_id", sa.BigInteger(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("events_together", sa.Integer(), nullable=False),
+        sa.Column("last_seen_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index(
+        "idx_co_attendance_recent",
+        "co_attendance",
+        ["user_id", sa.text("last_seen_at DESC"), sa.text("events_together DESC"), "other_id"],
+    )
+
+    # первичное заполнение: все уже прошедшие события (горячие и архив) считаются учтёнными
+    op.execute("UPDATE events SET pairs_counted_at = now() WHERE status = 'past'")
+    op.execute(
+        """
+        WITH counted AS (
+            SELECT ep.event_id, ep.user_id, e.date_time
+            FROM event_participants ep JOIN events e ON e.id = ep.event_id
+            WHERE e.pairs_counted_at IS NOT NULL AND ep.status = 'joined' AND ep.is_visible
+            UNION ALL
+            SELECT epa.event_id, epa.user_id, ea.date_time
+            FROM event_participants_archive epa JOIN events_archive ea ON ea.id = epa.event_id
+            WHERE epa.status = 'joined' AND epa.is_visible
+        )
+        INSERT INTO co_attendance (user_id, other_id, events_together, last_seen_at)
+        SELECT a.user_id, b.user_id, count(*), max(a.date_time)
+        FROM counted a JOIN counted b ON b.event_id = a.event_id AND b.user_id <> a.user_id
+        GROUP BY a.user_id, b.user_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_co_attendance_recent", table_name="co_attendance")
+    op.drop_table("co_attendance")
+    op.drop_index("idx_events_pairs_pending", table_name="events")
+    op.drop_column("events", "pairs_counted_at")
@@ -0,0 +1,37 @@
+"""events joined_count
+
+Revision ID: c7d2f19a4e03
+Revises: a41c7e2d9b10
+Create Date: 2026-10-18 10:03:17.540912+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d2f19a4e03'
+down_revision: Union[str, None] = 'a41c7e2d9b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("events", sa.Column("joined_count", sa.Integer(), server_default=sa.text("0"), nullable=False))
+    op.execute("""
+        UPDATE events e
+        SET joined_count = c.cnt
+        FROM (
+            SELECT event_id, count(*) AS cnt
+            FROM event_participants
+            WHERE status = 'joined'
+            GROUP BY event_id
+        ) c
+        WHERE c.event_id = e.id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column("events", "joined_count")
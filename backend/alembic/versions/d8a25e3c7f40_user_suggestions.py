@@ -0,0 +1,48 @@
+"""user_suggestions top-K + suggestion_dirty queue
+
+Revision ID: d8a25e3c7f40
+Revises: c4f1a7b2d9e6
+Create Date: 2026-10-18 15:12:03.774102+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8a25e3c7f40'
+down_revision: Union[str, None] = 'c4f1a7b2d9e6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_suggestions",
+        sa.Column("user_id", sa.BigInteger(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("candidate_id", sa.BigInteger(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("mutual_count", sa.Integer(), nullable=False),
+        sa.Column("score", sa.Integer(), nullable=False),
+        sa.Column("computed_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+    )
+    op.create_index(
+        "idx_user_suggestions_rank",
+        "user_suggestions",
+        ["user_id", sa.text("score DESC"), "candidate_id"],
+    )
+
+    op.create_table(
+        "suggestion_dirty",
+        sa.Column("user_id", sa.BigInteger(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("marked_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+    )
+    # первый расчёт — для всех, у кого уже есть контакты; разберёт фоновая задача
+    op.execute("INSERT INTO suggestion_dirty (user_id) SELECT DISTINCT user_id FROM co_attendance")
+
+
+def downgrade() -> None:
+    op.drop_table("suggestion_dirty")
+    op.drop_index("idx_user_suggestions_rank", table_name="user_suggestions")
+    op.drop_table("user_suggestions")
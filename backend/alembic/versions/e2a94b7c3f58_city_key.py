@@ -0,0 +1,42 @@
+"""events/users city_key
+
+Revision ID: e2a94b7c3f58
+Revises: 5b8e0c6f1d27
+Create Date: 2026-10-18 11:20:52.893310+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a94b7c3f58'
+down_revision: Union[str, None] = '5b8e0c6f1d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CITY_KEY_SQL = r"lower(regexp_replace(btrim(city), '\s+', ' ', 'g'))"
+
+
+def upgrade() -> None:
+    # STORED generated-колонка: существующие строки заполняются при добавлении
+    op.add_column("events", sa.Column("city_key", sa.Text(), sa.Computed(CITY_KEY_SQL, persisted=True), nullable=False))
+    op.add_column("users", sa.Column("city_key", sa.Text(), sa.Computed(CITY_KEY_SQL, persisted=True), nullable=True))
+
+    op.drop_index("idx_events_city_date", table_name="events")
+    op.drop_index("idx_events_city_gender", table_name="events")
+    op.create_index("idx_events_city_key_date", "events", ["city_key", "date_time", "id"])
+    op.create_index("idx_events_city_key_gender", "events", ["city_key", "gender_restriction"])
+    op.create_index("idx_users_city_key", "users", ["city_key"])
+
+
+def downgrade() -> None:
+    op.drop_index("idx_users_city_key", table_name="users")
+    op.drop_index("idx_events_city_key_gender", table_name="events")
+    op.drop_index("idx_events_city_key_date", table_name="events")
+    op.create_index("idx_events_city_gender", "events", ["city", "gender_restriction"])
+    op.create_index("idx_events_city_date", "events", ["city", "date_time"])
+    op.drop_column("users", "city_key")
+    op.drop_column("events", "city_key")
@@ -0,0 +1,46 @@
+"""delta sync: participants.updated_at, note tombstones, updated_at indexes
+
+Revision ID: e5b7c19d2a84
+Revises: d8a25e3c7f40
+Create Date: 2026-10-18 15:46:50.129377+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b7c19d2a84'
+down_revision: Union[str, None] = 'd8a25e3c7f40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "event_participants",
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+    )
+    op.execute("UPDATE event_participants SET updated_at = joined_at")
+    op.create_index("idx_ep_user_updated", "event_participants", ["user_id", "updated_at"])
+    op.create_index("idx_events_updated", "events", ["updated_at", "id"])
+    op.create_index("ix_user_notes_owner_updated", "user_notes", ["owner_id", "updated_at"])
+
+    op.create_table(
+        "user_note_deletions",
+        sa.Column("owner_id", sa.BigInteger(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("target_user_id", sa.BigInteger(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("deleted_at", sa.TIMESTAMP(timezone=True), nullable=False),
+    )
+    op.create_index("ix_user_note_deletions_owner_deleted", "user_note_deletions", ["owner_id", "deleted_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_note_deletions_owner_deleted", table_name="user_note_deletions")
+    op.drop_table("user_note_deletions")
+    op.drop_index("ix_user_notes_owner_updated", table_name="user_notes")
+    op.drop_index("idx_events_updated", table_name="events")
+    op.drop_index("idx_ep_user_updated", table_name="event_participants")
+    op.drop_column("event_participants", "updated_at")
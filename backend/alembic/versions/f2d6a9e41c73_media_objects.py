@@ -0,0 +1,36 @@
+"""media_objects: content-addressed upload index
+
+Revision ID: f2d6a9e41c73
+Revises: e5b7c19d2a84
+Create Date: 2026-10-18 18:40:27.319514+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2d6a9e41c73'
+down_revision: Union[str, None] = 'e5b7c19d2a84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "media_objects",
+        sa.Column("sha256", sa.Text(), primary_key=True),
+        sa.Column("key_prefix", sa.Text(), nullable=False),
+        sa.Column("ext", sa.Text(), nullable=False),
+        sa.Column("content_type", sa.Text(), nullable=False),
+        sa.Column("size", sa.BigInteger(), nullable=False),
+        sa.Column("uploads", sa.Integer(), server_default="1", nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("last_uploaded_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("media_objects")
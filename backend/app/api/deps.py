@@ -1,11 +1,13 @@
 from typing import Any, Optional
 from fastapi import Depends, Header, HTTPException, status
 from sqlalchemy.orm import Session
-from jose import jwt, JWTError
+from jose import JWTError
 
 from app.db.session import SessionLocal
 from app.core.config import settings
+from app.core.security import decode_access_token
 from app.models.user import User, UserRole
+from app.services.user_cache import CurrentIdentity, fresh_identity, identity_of, load_identity, remember_identity
 
 def get_db():
     db = SessionLocal()
@@ -14,27 +16,20 @@ def get_db():
     finally:
         db.close()
 
-def assert_can_manage_roles(current: User) -> None:
+def assert_can_manage_roles(current: User | CurrentIdentity) -> None:
     if current.role == UserRole.admin:
         return
     if current.id in settings.role_managers:
         return
     raise HTTPException(status_code=403, detail="forbidden")
 
-def get_current_user(
-    authorization: Optional[str] = Header(default=None),
-    db: Session = Depends(get_db), # type: ignore
-) -> User:
+def _token_user_id(authorization: Optional[str]) -> int:
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="missing bearer token")
     token = authorization.split(" ", 1)[1]
 
     try:
-        payload: dict[str, Any] = jwt.decode(
-            token,
-            settings.jwt_secret.get_secret_value(),
-            algorithms=["HS256"],
-        )
+        payload: dict[str, Any] = decode_access_token(token)
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="invalid token")
 
@@ -42,11 +37,39 @@ def get_current_user(
     if not isinstance(sub, (str, int)):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="invalid token")
     try:
-        uid = int(sub)
+        return int(sub)
     except (TypeError, ValueError):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="invalid token")
 
+def get_current_user(
+    authorization: Optional[str] = Header(default=None),
+    db: Session = Depends(get_db), # type: ignore
+) -> User:
+    uid = _token_user_id(authorization)
     user = db.get(User, uid)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="user not found")
-    return user
\ No newline at end of file
+    remember_identity(identity_of(user))
+    return user
+
+def get_current_identity(
+    authorization: Optional[str] = Header(default=None),
+    db: Session = Depends(get_db), # type: ignore
+) -> CurrentIdentity:
+    """id/роль/пол без похода в БД (кэш user:{id}); сессия берёт соединение только при промахе."""
+    uid = _token_user_id(authorization)
+    identity = load_identity(db, uid)
+    if identity is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="user not found")
+    return identity
+
+def get_fresh_identity(
+    authorization: Optional[str] = Header(default=None),
+    db: Session = Depends(get_db), # type: ignore
+) -> CurrentIdentity:
+    """То же, но всегда из БД — для проверок роли: понижение на другом воркере не должно пережить TTL кэша."""
+    uid = _token_user_id(authorization)
+    identity = fresh_identity(db, uid)
+    if identity is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="user not found")
+    return identity
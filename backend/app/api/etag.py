@@ -0,0 +1,28 @@
+import hashlib
+import json
+from typing import Any, Optional
+
+from fastapi import Response
+
+ETAG_HEADER = "ETag"
+CACHE_CONTROL = "private, no-cache"
+
+def make_etag(*parts: Any) -> str:
+    raw = json.dumps(parts, separators=(",", ":"), default=str, sort_keys=True)
+    return '"' + hashlib.sha1(raw.encode("utf-8")).hexdigest() + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag == etag or tag == "W/" + etag:
+            return True
+    return False
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={ETAG_HEADER: etag, "Cache-Control": CACHE_CONTROL})
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers[ETAG_HEADER] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
@@ -0,0 +1,16 @@
+from fastapi import HTTPException
+
+MAX_BATCH_IDS = 200
+
+def parse_id_list(raw: str, name: str = "ids", max_ids: int = MAX_BATCH_IDS) -> list[int]:
+    """'1,2,3' -> [1, 2, 3] без повторов, в исходном порядке; 400 на мусор и превышение лимита."""
+    try:
+        ids = [int(x) for x in raw.split(",") if x.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"'{name}' must be comma-separated integers")
+    if not ids:
+        raise HTTPException(status_code=400, detail=f"'{name}' is empty")
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > max_ids:
+        raise HTTPException(status_code=400, detail=f"at most {max_ids} {name}")
+    return ids
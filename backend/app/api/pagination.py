@@ -0,0 +1,48 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_, tuple_
+from sqlalchemy.sql.elements import ColumnElement
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(*values: Any) -> str:
+    raw = json.dumps(
+        [v.isoformat() if isinstance(v, datetime) else v for v in values],
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, *parsers: Callable[[Any], Any]) -> list[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(parsers):
+            raise ValueError("cursor arity")
+        return [parse(v) for parse, v in zip(parsers, values)]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="bad cursor")
+
+def parse_dt(v: str) -> datetime:
+    return datetime.fromisoformat(v)
+
+def keyset_after(keys: Sequence[tuple[Any, Any, bool]]) -> ColumnElement[bool]:
+    """
+    Условие «строго после курсора» для ORDER BY по keys = [(колонка, значение, desc), ...].
+    Если все направления совпадают — row comparison (её умеет btree-индекс),
+    иначе — развёрнутая дизъюнкция.
+    """
+    directions = {desc for _, _, desc in keys}
+    if len(directions) == 1:
+        cols = tuple_(*[col for col, _, _ in keys])
+        vals = tuple_(*[val for _, val, _ in keys])
+        return cols < vals if directions.pop() else cols > vals
+
+    conds = []
+    for i, (col, val, desc) in enumerate(keys):
+        prefix = [c == v for c, v, _ in keys[:i]]
+        conds.append(and_(*prefix, col < val if desc else col > val))
+    return or_(*conds)
@@ -6,6 +6,7 @@ from app.api.v1.history import router as history_router
 from app.api.v1.notes import router as notes_router
 from app.api.v1.files import router as files_router
 from app.api.v1.admin import router as admin_router  
+from app.api.v1.sync import router as sync_router
 
 api_router = APIRouter()
 api_router.include_router(auth_router)
@@ -14,4 +15,5 @@ api_router.include_router(user_router)
 api_router.include_router(history_router)
 api_router.include_router(notes_router)
 api_router.include_router(files_router)
-api_router.include_router(admin_router) 
\ No newline at end of file
+api_router.include_router(admin_router)
+api_router.include_router(sync_router) 
\ No newline at end of file
@@ -7,6 +7,8 @@ from app.api.deps import get_db
 from app.core.config import settings
 from app.core.deps import require_admin  
 from app.models import User               
+from app.core.security import revoke_tokens
+from app.services.user_cache import invalidate_user
 
 log = logging.getLogger("admin-users")
 router = APIRouter(prefix="/admin/users", tags=["admin"])
@@ -26,6 +28,8 @@ def change_role(username: str, payload: dict, db: Session = Depends(get_db), adm
     setattr(user, "role", new_role)
     db.add(user)
     db.commit()          
+    invalidate_user(user.id)
+    revoke_tokens(user.id)
     db.refresh(user)     
 
     log.info("role change: %s (%s) %s -> %s by admin=%s",
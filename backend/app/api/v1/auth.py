@@ -1,14 +1,62 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import and_, exists, func, literal, or_, select, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 from app.core.config import settings
 from app.core.security import create_access_token
 from app.db.session import SessionLocal
-from app.models.user import User, UserRole
+from app.models.user import User, UserGender, UserRole
 from app.schemas.auth import TelegramInintIn, TokenOut, UserOut
 from app.services.telegram_auth import validate_init_data, InitDataError
+from app.services.user_cache import CurrentIdentity, remember_identity
 
 router = APIRouter()
 
+_USER_COLUMNS = ("id", "username", "full_name", "city", "role", "gender", "avatar_url")
+
+def _upsert_user(db: Session, tg_id: int, username: str | None, full_name: str, photo_url: str | None):
+    """
+    Логин одним стейтментом: INSERT ... ON CONFLICT DO UPDATE только если профиль из Telegram
+    отличается. Без изменений запись не пишется — строку отдаёт второй SELECT из users.
+    Возвращает (строка пользователя, была ли запись).
+    """
+    t = User.__table__
+    ins = pg_insert(t).values(
+        id=tg_id, username=username, full_name=full_name, avatar_url=photo_url,
+        role=UserRole.user, gender=UserGender.unknown, trust_score=0,
+    )
+    ex = ins.excluded
+    up = (
+        ins.on_conflict_do_update(
+            index_elements=[t.c.id],
+            set_={
+                "username": ex.username,
+                "full_name": ex.full_name,
+                "avatar_url": func.coalesce(ex.avatar_url, t.c.avatar_url),
+            },
+            where=or_(
+                t.c.username.is_distinct_from(ex.username),
+                t.c.full_name.is_distinct_from(ex.full_name),
+                and_(ex.avatar_url.is_not(None), t.c.avatar_url.is_distinct_from(ex.avatar_url)),
+            ),
+        )
+        .returning(*[t.c[c] for c in _USER_COLUMNS])
+        .cte("up")
+    )
+    stmt = union_all(
+        select(*[up.c[c] for c in _USER_COLUMNS], literal(True).label("written")),
+        select(*[t.c[c] for c in _USER_COLUMNS], literal(False).label("written"))
+        .where(t.c.id == tg_id, ~exists(select(up.c.id))),
+    )
+    row = db.execute(stmt).first()
+    if row is None:
+        # параллельный первый логин того же пользователя: вставка соседа не видна в нашем снимке
+        db.rollback()
+        row = db.execute(stmt).first()
+        if row is None:
+            raise HTTPException(status_code=409, detail="login in progress, retry")
+    return row, row.written
+
 def get_db():
     db = SessionLocal()
     try:
@@ -34,23 +82,17 @@ def telegram_init(payload: TelegramInintIn, db: Session = Depends(get_db)):
     full_name = (first_name + " " + last_name).strip() or username or str(tg_id)
     photo_url = (user_data.get("photo_url") or "").strip() or None
     
-    user = db.get(User, tg_id)
-    if user is None:
-        user = User(id=tg_id, username=username, full_name=full_name, role=UserRole.user, avatar_url=photo_url)
-        db.add(user)
-    else:
-        user.username = username
-        user.full_name = full_name
-        if photo_url and user.avatar_url != photo_url:  
-            user.avatar_url = photo_url
-    
-    db.commit(); db.refresh(user)
+    row, written = _upsert_user(db, tg_id, username, full_name, photo_url)
+    if written:
+        db.commit()
+    user = row
+    remember_identity(CurrentIdentity(id=user.id, role=user.role, gender=user.gender))
     
     token = create_access_token(sub=str(user.id), role=user.role.value)
     return TokenOut(
         token=token,
         user=UserOut(
-            id=user.id, username=username, full_name=user.full_name,
+            id=user.id, username=user.username, full_name=user.full_name,
             city=user.city, role=user.role.value, avatar_url=user.avatar_url
         ),
     )
\ No newline at end of file
@@ -1,13 +1,15 @@
 from datetime import datetime, timezone
 from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select, func, literal, exists, and_, or_, text, case
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlalchemy import select, update, func, exists, and_, or_, text, case, cast, true, null, Float
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
 import re
 
-from app.api.deps import get_db, get_current_user
+from app.api.deps import get_db, get_current_identity, get_fresh_identity
+from app.api.etag import etag_matches, make_etag, not_modified, set_etag
+from app.api.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, keyset_after, parse_dt
 from app.models import (
     User,
     Event, 
@@ -16,17 +18,40 @@ from app.models import (
     ParticipationStatus,
     Gender,
     UserGender,
-    UserRole
+    UserRole,
+    UserNote,
 )
+from app.models.city import city_key_of
 from app.schemas import (
     EventCreate,
     EventCardOut,
+    EventFacetsOut,
     EventOut,
     VisibilityUpdateIn,
     VisibilityOut,
     ParticipantOut,
 )
-from app.services.maintenance import recompute_event_status
+from app.services.archive import event_tables
+from app.services.co_attendance import refresh_pairs
+from app.services.event_cache import (
+    cache_city_key,
+    card_out,
+    facets_key,
+    feed_key,
+    get_facets,
+    get_feed,
+    invalidate_events,
+    invalidate_feed,
+    joined_event_ids,
+    load_event_cards,
+    put_facets,
+    put_feed,
+)
+from app.services.geo import cell_ranges, distance_km, distance_km_sql, parse_near
+from app.services.images import photo_variants
+from app.services.maintenance import apply_event_status
+from app.services.status_scheduler import status_scheduler
+from app.services.user_cache import CurrentIdentity, fresh_identity
 
 router = APIRouter()
 
@@ -36,6 +61,71 @@ def _now_utc() -> datetime:
 def _lock_event(db: Session, event_id: int) -> None:
     db.execute(text("SELECT pg_advisory_xact_lock(:k)"), {"k": event_id})
     
+# Один стейтмент вместо advisory lock + get + COUNT + SELECT FOR UPDATE.
+# UPDATE events берёт row lock и перепроверяет (EvalPlanQual) вместимость/статус/дату/пол,
+# поэтому параллельные join к одному событию не переполняют его. Статус closed
+# выставляется тем же UPDATE по уже посчитанному счётчику.
+_JOIN_SQL = text("""
+    WITH ev AS (
+        UPDATE events
+        SET joined_count = joined_count + 1,
+            status = CASE
+                WHEN max_participants IS NOT NULL AND joined_count + 1 >= max_participants THEN 'closed'
+                ELSE status
+            END,
+            updated_at = now()
+        WHERE id = :event_id
+          AND status = 'open'
+          AND date_time >= now()
+          AND (max_participants IS NULL OR joined_count < max_participants)
+          AND (gender_restriction = 'all' OR gender_restriction::text = :gender)
+          AND NOT EXISTS (
+              SELECT 1 FROM event_participants
+              WHERE event_id = :event_id AND user_id = :user_id AND status = 'joined'
+          )
+        RETURNING id
+    ), ins AS (
+        INSERT INTO event_participants (event_id, user_id, status, is_visible, joined_at, updated_at)
+        SELECT id, :user_id, 'joined', true, now(), now() FROM ev
+        ON CONFLICT (event_id, user_id) DO UPDATE
+            SET status = 'joined', is_visible = true, joined_at = now(), updated_at = now()
+            WHERE event_participants.status <> 'joined'
+        RETURNING event_id
+    )
+    SELECT ev.id, ins.event_id IS NOT NULL AS inserted
+    FROM ev LEFT JOIN ins ON ins.event_id = ev.id
+""")
+
+def _raise_join_rejection(db: Session, event_id: int, current: CurrentIdentity) -> None:
+    ev = db.get(Event, event_id)
+    if not ev:
+        raise HTTPException(status_code=404, detail="event not found")
+
+    ep = EventParticipant
+    already = db.scalar(select(exists().where(
+        and_(ep.event_id == event_id, ep.user_id == current.id, ep.status == ParticipationStatus.joined)
+    )))
+    if already:
+        return
+
+    if ev.status != EventStatus.open or ev.date_time < _now_utc():
+        raise HTTPException(status_code=403, detail="event is not joinable")
+
+    if ev.max_participants is not None and ev.joined_count >= ev.max_participants:
+        raise HTTPException(status_code=409, detail="event is full")
+
+    if ev.gender_restriction != Gender.all:
+        if current.gender == UserGender.unknown:
+            raise HTTPException(status_code=409, detail="Заполните свой пол в профиле")
+        if ev.gender_restriction.value != current.gender.value:
+            if ev.gender_restriction.value == "female":
+                raise HTTPException(status_code=403, detail="Мероприятие для девушек!")
+            else:
+                raise HTTPException(status_code=403, detail="Мероприятие для мужчин!")
+
+    # условия снова выполняются (место освободилось между стейтментами) — пусть клиент повторит
+    raise HTTPException(status_code=409, detail="event is busy, retry")
+
 def _norm(dt: Optional[datetime]) -> Optional[datetime]:
     if not dt:
         return None
@@ -56,10 +146,37 @@ def _like_token(t: str) -> str:
     t = t.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
     return f"%{t}%"
 
+def _event_filters(
+    city_norm: Optional[str],
+    df: Optional[datetime],
+    dt: Optional[datetime],
+    gender: Optional[str],
+    tokens: list[str],
+) -> dict[str, list]:
+    """Условия ленты, сгруппированные по измерению фильтра (для фасетов нужны «все, кроме своего»)."""
+    if df and dt and df > dt:
+        raise HTTPException(status_code=400, detail="'from' must be <= 'to'")
+
+    filters: dict[str, list] = {"city": [], "date": [], "gender": [], "q": []}
+    if city_norm:
+        filters["city"].append(Event.city_key == city_key_of(city_norm))
+    if df:
+        filters["date"].append(Event.date_time >= df)
+    else:
+        filters["date"].append(Event.date_time >= _now_utc())
+    if dt:
+        filters["date"].append(Event.date_time <= dt)
+    if gender=='male' or gender=='female':
+        filters["gender"].append(Event.gender_restriction == gender)
+    for t in tokens:
+        filters["q"].append(Event.title.ilike(_like_token(t), escape="\\"))
+    return filters
+
 @router.get("/events", response_model=list[EventCardOut])
 def list_events(
+    response: Response,
     db: Session = Depends(get_db),
-    current: User = Depends(get_current_user),
+    current: CurrentIdentity = Depends(get_current_identity),
     city: Optional[str] = Query(None),
     date_from: Optional[datetime] = Query(None, alias="from"),
     date_to: Optional[datetime] = Query(None, alias="to"),
@@ -67,120 +184,190 @@ def list_events(
     offset: int = Query(0, ge=0),
     gender: Optional[str] = Query(None, regex="^(male|female|all)$"),
     q: Optional[str] = Query(None, min_length=1, max_length=120),
+    cursor: Optional[str] = Query(None, max_length=200),
+    near: Optional[str] = Query(None, max_length=64, description="lat,lon"),
+    radius_km: float = Query(5.0, gt=0, le=50),
+    sort: Optional[str] = Query(None, regex="^(time|distance)$"),
+    if_none_match: Optional[str] = Header(None),
 ):
-    conds = []
     df = _norm(date_from)
     dt = _norm(date_to)
     city_norm = _norm_city(city)
-    if city_norm:
-        conds.append(func.lower(func.trim(Event.city)) == city_norm.lower())
-    if df:
-        conds.append(Event.date_time >= df)
-    else:
-        conds.append(Event.date_time >= _now_utc())
-    if dt:
-        conds.append(Event.date_time <= dt)
+    tokens = _query_tokens(q)
+    filters = _event_filters(city_norm, df, dt, gender, tokens)
+    conds = [c for group in filters.values() for c in group]
 
-    if df and dt and df > dt:
-        raise HTTPException(status_code=400, detail="'from' must be <= 'to'")
+    # (выражение, имя колонки в строке, desc, парсер значения из курсора)
+    order_keys = [
+        (Event.date_time, "date_time", False, parse_dt),
+        (Event.id, "id", False, int),
+    ]
+    point = None
+    if near:
+        try:
+            point = parse_near(near)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="'near' must be 'lat,lon'")
+        # индексный отбор по ячейкам сетки, затем точная дистанция только для попавших строк
+        conds.append(or_(*[Event.geo_cell.between(lo, hi) for lo, hi in cell_ranges(*point, radius_km)]))
+        distance = distance_km_sql(Event.lat, Event.lon, *point)
+        conds.append(distance <= radius_km)
 
-    if gender=='male' or gender=='female':
-        conds.append(Event.gender_restriction == gender)
-        
+    # real -> double, чтобы значение из курсора сравнивалось без потери точности
+    if point and sort != "time":
+        order_keys.insert(0, (cast(distance, Float(precision=53)).label("distance"), "distance", False, float))
+    elif tokens and sort != "time":
+        rank = cast(func.word_similarity(" ".join(tokens), Event.title), Float(precision=53)).label("rank")
+        order_keys.insert(0, (rank, "rank", True, float))
+    extra_cols = [col for col, name, _, _ in order_keys if name in ("rank", "distance")]
+
+    if cursor:
+        after = decode_cursor(cursor, *[parse for *_, parse in order_keys])
+        conds.append(keyset_after([(col, v, desc) for (col, _, desc, _), v in zip(order_keys, after)]))
+        offset = 0
+
+    fkey = feed_key(cache_city_key(city_norm), {
+        "from": df, "to": dt, "gender": gender, "q": tokens,
+        "cursor": cursor, "limit": limit, "offset": offset,
+        "near": point, "radius_km": radius_km if point else None, "sort": sort,
+    })
+    feed = get_feed(fkey)
+    if feed is None:
+        stmt = (
+            select(Event.id, Event.date_time, *extra_cols)
+            .where(and_(*conds))
+            .order_by(*[col.desc() if desc else col.asc() for col, _, desc, _ in order_keys])
+            .limit(limit + 1)
+            .offset(offset)
+        )
+        rows = db.execute(stmt).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(*[getattr(last, name) for _, name, _, _ in order_keys])
+        feed = {"ids": [r.id for r in rows], "next": next_cursor}
+        put_feed(fkey, feed["ids"], next_cursor)
+
+    if feed["next"]:
+        response.headers[NEXT_CURSOR_HEADER] = feed["next"]
+
+    now = _now_utc()
+    cards = load_event_cards(db, feed["ids"])
+    # лента без 'from' закэширована с now() на момент промаха — отбрасываем успевшие начаться
+    ids = [i for i in feed["ids"] if i in cards and (df is not None or cards[i]["date_time"] >= now)]
+
+    # членство — из БД, не из карточки: карточка может быть устаревшей (чужой воркер, гонка заполнения
+    # кэша с join), а своё участие клиент должен увидеть сразу
+    joined = joined_event_ids(db, current.id, ids)
+    etag = make_etag(current.id, fkey, [(i, cards[i]["updated_at"]) for i in ids], sorted(joined))
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
+    out = [card_out(cards[i], i in joined) for i in ids]
+    if point:
+        for card in out:
+            if card.lat is not None and card.lon is not None:
+                card.distance_km = round(distance_km(*point, card.lat, card.lon), 2)
+    return out
+
+
+
+@router.get("/events/facets", response_model=EventFacetsOut)
+def event_facets(
+    db: Session = Depends(get_db),
+    current: CurrentIdentity = Depends(get_current_identity),
+    city: Optional[str] = Query(None),
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    gender: Optional[str] = Query(None, regex="^(male|female|all)$"),
+    q: Optional[str] = Query(None, min_length=1, max_length=120),
+    tz: str = Query("UTC", max_length=64),
+):
+    try:
+        ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=400, detail="unknown tz")
+
+    df = _norm(date_from)
+    dt = _norm(date_to)
+    city_norm = _norm_city(city)
     tokens = _query_tokens(q)
-    for t in tokens:
-        conds.append(Event.title.ilike(_like_token(t), escape="\\"))
+    filters = _event_filters(city_norm, df, dt, gender, tokens)
 
-    ep = EventParticipant
-    count_subq = (
-        select(func.count())
-        .where(and_(ep.event_id == Event.id, ep.status == ParticipationStatus.joined))
-        .correlate(Event)
-        .scalar_subquery()
-    )
-    is_joined_subq = (
-        select(literal(True))
-        .where(and_(ep.event_id == Event.id, ep.user_id == current.id, ep.status == ParticipationStatus.joined))
-        .correlate(Event)
-        .exists()
-    )
-    
-    eff_status = case(
-        (Event.date_time < func.now(), literal("past")),
-        else_=Event.status
-    ).label("status")
+    fkey = facets_key({"city": cache_city_key(city_norm), "from": df, "to": dt, "gender": gender, "q": tokens, "tz": tz})
+    cached = get_facets(fkey)
+    if cached is not None:
+        return EventFacetsOut(**cached)
+
+    # каждый фасет считается со всеми активными фильтрами, кроме своего собственного
+    def matches(*dims: str):
+        conds = [c for d in dims for c in filters[d]]
+        return and_(true(), *conds)
+
+    base = select(
+        Event.city_key,
+        Event.city,
+        func.date(func.timezone(tz, Event.date_time)).label("day"),
+        Event.gender_restriction,
+        matches("city").label("m_city"),
+        matches("date").label("m_date"),
+        matches("gender").label("m_gender"),
+    ).where(and_(Event.date_time >= _now_utc(), *filters["q"])).subquery()
 
     stmt = (
         select(
-            Event.id, Event.title, Event.location, Event.city, Event.date_time,
-            Event.gender_restriction, Event.creator_id,
-            Event.photo_url,
-            eff_status, Event.max_participants,
-            count_subq.label("participants_count"),
-            is_joined_subq.label("is_user_joined"),
+            base.c.city_key, base.c.day, base.c.gender_restriction,
+            func.min(base.c.city).label("city_label"),
+            func.grouping(base.c.city_key).label("g_city"),
+            func.grouping(base.c.day).label("g_day"),
+            func.count().filter(and_(base.c.m_date, base.c.m_gender)).label("n_city"),
+            func.count().filter(and_(base.c.m_city, base.c.m_gender)).label("n_day"),
+            func.count().filter(and_(base.c.m_city, base.c.m_date)).label("n_gender"),
         )
-        .where(and_(*conds))
-        .order_by(Event.date_time.asc())
-        .limit(limit)
-        .offset(offset)
+        .group_by(func.grouping_sets(base.c.city_key, base.c.day, base.c.gender_restriction))
     )
-    rows = db.execute(stmt).all()
-    return [
-        EventCardOut(
-            id=r.id, title=r.title, location=r.location, city=r.city, date_time=r.date_time,
-            gender_restriction=r.gender_restriction, creator_id=r.creator_id,
-            participants_count=r.participants_count, is_user_joined=bool(r.is_user_joined),
-            photo_url=r.photo_url,
-            status=r.status, max_participants=r.max_participants,
-        )
-        for r in rows
-    ]
 
+    out: dict[str, list[dict]] = {"cities": [], "days": [], "genders": []}
+    for r in db.execute(stmt).all():
+        if r.g_city == 0:
+            if r.n_city:
+                out["cities"].append({"value": r.city_key, "label": r.city_label, "count": r.n_city})
+        elif r.g_day == 0:
+            if r.n_day:
+                out["days"].append({"value": r.day.isoformat(), "count": r.n_day})
+        elif r.n_gender:
+            out["genders"].append({"value": getattr(r.gender_restriction, "value", r.gender_restriction), "count": r.n_gender})
+
+    out["cities"].sort(key=lambda f: (-f["count"], f["value"]))
+    out["days"].sort(key=lambda f: f["value"])
+    out["genders"].sort(key=lambda f: f["value"])
+    put_facets(fkey, out)
+    return EventFacetsOut(**out)
 
 
 @router.get("/events/{event_id}", response_model=EventOut)
 def get_event(
     event_id: int,
+    response: Response,
     db: Session = Depends(get_db),
-    current: User = Depends(get_current_user),
+    current: CurrentIdentity = Depends(get_current_identity),
+    if_none_match: Optional[str] = Header(None),
 ):
-    ep = EventParticipant
-    count_subq = (
-        select(func.count())
-        .where(and_(ep.event_id == Event.id, ep.status == ParticipationStatus.joined))
-        .correlate(Event)
-        .scalar_subquery()
-    )
-    is_joined_subq = (
-        select(literal(True))
-        .where(and_(ep.event_id == Event.id, ep.user_id == current.id, ep.status == ParticipationStatus.joined))
-        .correlate(Event).exists()
-    )
-    
-    eff_status = case(
-        (Event.date_time < func.now(), literal("past")),
-        else_=Event.status
-    ).label("status")
-
-    stmt = select(
-        Event.id, Event.title, Event.description, Event.location, Event.city, Event.date_time,
-        Event.gender_restriction, Event.max_participants, Event.creator_id,
-        Event.photo_url,
-        count_subq.label("participants_count"),
-        is_joined_subq.label("is_user_joined"),
-        eff_status,
-    ).where(Event.id == event_id)
-
-    row = db.execute(stmt).first()
-    if not row:
+    card = load_event_cards(db, [event_id]).get(event_id)
+    if not card:
         raise HTTPException(status_code=404, detail="event not found")
 
+    is_joined = event_id in joined_event_ids(db, current.id, [event_id])
+    etag = make_etag(current.id, event_id, card["updated_at"], is_joined)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
     return EventOut(
-        id=row.id, title=row.title, description=row.description, location=row.location, city=row.city,
-        date_time=row.date_time, gender_restriction=row.gender_restriction, max_participants=row.max_participants,
-        status=row.status, creator_id=row.creator_id,
-        participants_count=row.participants_count, is_user_joined=bool(row.is_user_joined),
-        photo_url=row.photo_url,
+        **card_out(card, is_joined).model_dump(),
+        description=card["description"],
     )
 
 
@@ -188,7 +375,7 @@ def get_event(
 def create_event(
     payload: EventCreate,
     db: Session = Depends(get_db),
-    current: User = Depends(get_current_user),
+    current: CurrentIdentity = Depends(get_fresh_identity),
 ):
     if current.role not in (UserRole.organizer, UserRole.admin):
         raise HTTPException(status_code=403, detail="")
@@ -201,102 +388,88 @@ def create_event(
         gender_restriction=payload.gender_restriction,        
         max_participants=payload.max_participants,
         photo_url=payload.photo_url,
+        lat=payload.lat,
+        lon=payload.lon,
         creator_id=current.id,
     )
     db.add(e)
     db.commit()
     db.refresh(e)
+    invalidate_feed(e.city)
+    status_scheduler.notify(e.date_time)
 
-    ep = EventParticipant
-    participants_count = db.scalar(
-        select(func.count()).select_from(ep).where(
-            and_(ep.event_id == e.id, ep.status == ParticipationStatus.joined)
-        )
-    ) or 0
-    is_user_joined = bool(db.scalar(select(
-        exists().where(
-            and_(ep.event_id == e.id, ep.user_id == current.id, ep.status == ParticipationStatus.joined)
-        )
-    )))
+    is_user_joined = e.id in joined_event_ids(db, current.id, [e.id])
 
     return EventOut(
         id=e.id, title=e.title, description=e.description, location=e.location, city=e.city,
         date_time=e.date_time, gender_restriction=e.gender_restriction, max_participants=e.max_participants,
         status=e.status, creator_id=e.creator_id,
-        participants_count=participants_count, is_user_joined=bool(is_user_joined),
-        photo_url=e.photo_url,
+        participants_count=e.joined_count, is_user_joined=bool(is_user_joined),
+        photo_url=e.photo_url, photo_variants=photo_variants(e.photo_url), lat=e.lat, lon=e.lon,
     )
 
 @router.post("/events/{event_id}/join")
 def join_event(
     event_id: int,
     db: Session = Depends(get_db),
-    current: User = Depends(get_current_user)
+    current: CurrentIdentity = Depends(get_current_identity)
 ):
-    with db.begin_nested():
-        _lock_event(db, event_id)
-        
-        ev = db.get(Event, event_id)
-        if not ev:
-            raise HTTPException(status_code=404, detail="event not found")
-        if ev.status != EventStatus.open or ev.date_time < _now_utc():
-            raise HTTPException(status_code=403, detail="event is not joinable")
-        
-        ep = EventParticipant
-        joined_cnt = db.scalar(
-            select(func.count())
-            .select_from(ep)
-            .where(and_(ep.event_id == event_id, ep.status == ParticipationStatus.joined))
-        ) or 0
-        
-        if ev.max_participants is not None and joined_cnt >= ev.max_participants:
-            raise HTTPException(status_code=409, detail="event is full")
-        
-        if ev.gender_restriction != Gender.all:
-            if current.gender == UserGender.unknown:
-                raise HTTPException(status_code=409, detail="Заполните свой пол в профиле")
-            if ev.gender_restriction.value != current.gender.value:
-                if ev.gender_restriction.value == "female":
-                    raise HTTPException(status_code=403, detail="Мероприятие для девушек!")
-                else:
-                    raise HTTPException(status_code=403, detail="Мероприятие для мужчин!")
-        
-        existing = db.execute(
-            select(ep)
-            .where(and_(ep.event_id == event_id, ep.user_id == current.id))
-            .with_for_update()
-        ).scalar_one_or_none()
-        
-        try:
-            if existing is None:
-                rec = EventParticipant(
-                    event_id=event_id,
-                    user_id=current.id,
-                    status=ParticipationStatus.joined,
-                    is_visible=True,
-                )
-                db.add(rec)
-            else:
-                if existing.status != ParticipationStatus.joined:
-                    existing.status = ParticipationStatus.joined
-                    existing.is_visible = True
-                    existing.joined_at = _now_utc()
-        except IntegrityError:
-            pass
+    row = db.execute(_JOIN_SQL, {
+        "event_id": event_id,
+        "user_id": current.id,
+        "gender": current.gender.value,
+    }).first()
+    if row is None:
+        # пол мог смениться на другом воркере (кэш identity локальный) — перед отказом сверяемся с БД
+        fresh = fresh_identity(db, current.id) or current
+        if fresh.gender != current.gender:
+            current = fresh
+            row = db.execute(_JOIN_SQL, {
+                "event_id": event_id,
+                "user_id": current.id,
+                "gender": current.gender.value,
+            }).first()
+    if row is None:
+        # ничего не вставлено: объясняем почему (или пользователь уже участвует — это успех)
+        _raise_join_rejection(db, event_id, current)
+        return {"event_id": event_id, "joined": True}
+    if not row.inserted:
+        # двойное нажатие в гонке: счётчик увеличен, а запись уже была joined — возвращаем инкремент
+        # (и открываем событие, если закрыл его именно этот лишний инкремент)
+        db.execute(
+            update(Event)
+            .where(Event.id == event_id)
+            .values(
+                joined_count=Event.joined_count - 1,
+                status=case(
+                    (
+                        and_(
+                            Event.status == EventStatus.closed,
+                            Event.max_participants.is_not(None),
+                            Event.joined_count - 1 < Event.max_participants,
+                        ),
+                        EventStatus.open,
+                    ),
+                    else_=Event.status,
+                ),
+                updated_at=func.now(),
+            )
+        )
     db.commit()
-    recompute_event_status(event_id)
+    invalidate_events([event_id])
     return {"event_id": event_id, "joined": True}
 
 @router.post("/events/{event_id}/leave")
 def leave_event(
     event_id: int,
     db: Session = Depends(get_db),
-    current: User = Depends(get_current_user),
+    current: CurrentIdentity = Depends(get_current_identity),
 ):
     with db.begin_nested():
         _lock_event(db, event_id)
-        
-        ev = db.get(Event, event_id)
+
+        # join не берёт advisory lock — с его условным UPDATE сериализуемся блокировкой строки события
+        ev = db.get(Event, event_id, with_for_update=True, populate_existing=True)
         if not ev:
             raise HTTPException(status_code=404, detail="event not found")
         
@@ -314,9 +487,15 @@ def leave_event(
             if ev.status == EventStatus.past:
                 raise HTTPException(status_code=409, detail="Мероприятие уже прошло")
             existing.status = ParticipationStatus.left
+            existing.updated_at = func.now()
+            # счётчик прочитан под блокировкой строки (FOR UPDATE), так что новое значение известно без COUNT
+            new_count = ev.joined_count - 1
+            ev.joined_count = Event.joined_count - 1
+            ev.updated_at = func.now()
+            apply_event_status(ev, new_count)
     
     db.commit()
-    recompute_event_status(event_id)    
+    invalidate_events([event_id])
     return {"event_id": event_id, "left": True}
 
 @router.post("/events/{event_id}/visibility", response_model=VisibilityOut)
@@ -324,17 +503,17 @@ def set_visibility(
     event_id: int, 
     payload: VisibilityUpdateIn,
     db: Session = Depends(get_db),
-    current: User = Depends(get_current_user),
+    current: CurrentIdentity = Depends(get_current_identity),
 ):
     try:
         with db.begin_nested():
             _lock_event(db, event_id)
             
-            ev = db.get(Event, event_id)
-            if not ev:
+            tables = event_tables(db, event_id)
+            if tables is None:
                 raise HTTPException(status_code=404, detail="event not found")
             
-            ep = EventParticipant
+            _, ep = tables
             rec = db.execute(
                 select(ep)
                 .where(and_(ep.event_id == event_id, ep.user_id == current.id))
@@ -348,7 +527,22 @@ def set_visibility(
                 raise HTTPException(status_code=409, detail="not joined")
             
             if rec.is_visible != payload.is_visible:
+                ev_model, _ = tables
+                # строка события под FOR UPDATE: record_past_events не учтёт его параллельно со сменой видимости
+                counted = ev_model is not Event or db.scalar(
+                    select(Event.pairs_counted_at).where(Event.id == event_id).with_for_update()
+                ) is not None
                 rec.is_visible = payload.is_visible
+                if ep is EventParticipant:
+                    rec.updated_at = func.now()
+                if counted:
+                    db.flush()
+                    others = list(db.scalars(
+                        select(ep.user_id).where(
+                            and_(ep.event_id == event_id, ep.user_id != current.id, ep.status == ParticipationStatus.joined)
+                        )
+                    ))
+                    refresh_pairs(db, current.id, others)
         
         db.commit()
     except:
@@ -366,25 +560,29 @@ def set_visibility(
 def list_participants(
     event_id: int,
     db: Session = Depends(get_db),
-    current: User = Depends(get_current_user),
+    current: CurrentIdentity = Depends(get_current_identity),
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
+    with_notes: bool = Query(False),
 ):
-    ev = db.get(Event, event_id)
-    if not ev:
+    tables = event_tables(db, event_id)
+    if tables is None:
         raise HTTPException(status_code=404, detail="event not found")
     
-    ep = EventParticipant
+    _, ep = tables
     
+    stmt = select(
+        ep.user_id.label("id"),
+        User.username,
+        User.full_name, 
+        ep.is_visible,
+        User.avatar_url,
+        UserNote.text.label("note") if with_notes else null().label("note"),
+    ).join(User, User.id == ep.user_id)
+    if with_notes:
+        stmt = stmt.outerjoin(UserNote, and_(UserNote.owner_id == current.id, UserNote.target_user_id == ep.user_id))
     stmt = (
-        select(
-            ep.user_id.label("id"),
-            User.username,
-            User.full_name, 
-            ep.is_visible,
-            User.avatar_url,
-        )
-        .join(User, User.id == ep.user_id)
+        stmt
         .where(
             and_(
                 ep.event_id == event_id,
@@ -415,5 +613,6 @@ def list_participants(
                 full_name=r.full_name,
                 avatar_url=r.avatar_url,
                 is_visible=r.is_visible,
+                note=r.note,
             ))
     return result
\ No newline at end of file
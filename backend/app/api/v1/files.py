@@ -1,35 +1,69 @@
-from fastapi import APIRouter, Depends, File, UploadFile, HTTPException
-from app.api.deps import get_current_user
-from app.services.storage import get_storage
+import os, shutil, tempfile
+from fastapi import APIRouter, Depends, HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+from app.api.deps import get_current_identity
+from app.services.images import CONTENT_TYPES, build_variants
+from app.services.media import content_prefix, find_existing, register_upload, variant_keys
+from app.services.storage import Storage, get_storage
+from app.services.upload import UploadError, receive_image
 
 router = APIRouter()
-ALLOWED  = {".jpg", ".jpeg", ".png", ".webp"}
 MAX = 10 * 1024 * 1024
 
-@router.post("/files/upload")
+_UPLOAD_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                }
+            }
+        },
+    }
+}
+
+def _store_variants(storage: Storage, prefix: str, ext: str, files: dict[str, str]) -> None:
+    keys = variant_keys(prefix, ext)
+    # original — последним: по нему find_existing судит, что набор выгружен целиком
+    for name in sorted(files, key=lambda n: n == "original"):
+        path = files[name]
+        storage.put_file(path, keys[name], CONTENT_TYPES[os.path.splitext(path)[1]])
+
+@router.post("/files/upload", openapi_extra=_UPLOAD_BODY)
 async def upload_image(
-    file: UploadFile = File(...),
-    current = Depends(get_current_user),
+    request: Request,
+    current = Depends(get_current_identity),
 ):
-    ct = (file.content_type or "").lower()
-    if not ct.startswith("image/"):
-        raise HTTPException(415, "only images are allowed")
-    import os
-    ext = os.path.splitext(file.filename or "")[1].lower()
-    if ext not in ALLOWED:
-        raise HTTPException(415, f"allowed: {', '.join(sorted(ALLOWED))}")
-    
-    read = 0
-    CHUNK = 1024 * 1024
-    file.file.seek(0)
-    while True:
-        chunk = await file.read(CHUNK)
-        if not chunk: break
-        read += len(chunk)
-        if read > MAX:
-            raise HTTPException(413, "file too large")
-    file.file.seek(0)
-    
-    storage = get_storage()
-    url = storage.save(file.file, file.filename or "image", ct)
-    return {"url": str(url)}
\ No newline at end of file
+    # один потоковый проход: лимит, sha256 и тип по сигнатуре — пока байты приходят
+    try:
+        received = await receive_image(request, "file", MAX)
+    except UploadError as e:
+        raise HTTPException(e.status_code, e.detail)
+
+    storage = await run_in_threadpool(get_storage)
+    try:
+        # те же байты уже загружали — отдаём готовый набор, без перекодирования и выгрузки
+        prefix = await run_in_threadpool(find_existing, storage, received.sha256, received.ext)
+        if prefix is None:
+            prefix = content_prefix(received.sha256)
+            # варианты (card/detail/original без EXIF) считаются в пуле процессов; сам исходник не сохраняется
+            out_dir = tempfile.mkdtemp(prefix="variants-")
+            try:
+                try:
+                    files = await build_variants(received.path, out_dir, received.ext)
+                except ValueError as e:
+                    raise HTTPException(422, str(e))
+                await run_in_threadpool(_store_variants, storage, prefix, received.ext, files)
+            finally:
+                await run_in_threadpool(shutil.rmtree, out_dir, True)
+        await run_in_threadpool(
+            register_upload, received.sha256, prefix, received.ext, received.content_type, received.size,
+        )
+    finally:
+        await run_in_threadpool(received.discard)
+
+    urls = {name: storage.url(key) for name, key in variant_keys(prefix, received.ext).items()}
+    return {"url": urls["original"], "variants": urls}
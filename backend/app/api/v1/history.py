@@ -1,17 +1,18 @@
 from datetime import datetime, timezone
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import and_, func, select
-from sqlalchemy.orm import Session, aliased
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import and_, null, select
+from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user, get_db
+from app.api.deps import get_current_identity, get_db
+from app.api.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, keyset_after, parse_dt
 from app.models import (
-    Event,
-    EventParticipant, 
-    ParticipationStatus,
+    CoAttendance,
     User,
+    UserNote,
 )
+from app.services.user_cache import CurrentIdentity
 from app.schemas.history import PeopleHistoryItemOut
 
 router = APIRouter()
@@ -21,46 +22,53 @@ def _now_utc() -> datetime:
 
 @router.get("/history/people", response_model=list[PeopleHistoryItemOut])
 def my_people_history(
+    response: Response,
     db: Session = Depends(get_db),
-    current: User = Depends(get_current_user),
+    current: CurrentIdentity = Depends(get_current_identity),
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, max_length=200),
+    with_notes: bool = Query(False),
 ):
-    ep1 = aliased(EventParticipant)  # я
-    ep2 = aliased(EventParticipant)  # другой
-    u2  = aliased(User)
+    co = CoAttendance
+    # (колонка, имя в строке, desc, парсер) — порядок совпадает с idx_co_attendance_recent
+    order_keys = [
+        (co.last_seen_at, "last_seen_at", True, parse_dt),
+        (co.events_together, "events_together", True, int),
+        (co.other_id, "id", False, int),
+    ]
+    conds = [co.user_id == current.id]
+    if cursor:
+        after = decode_cursor(cursor, *[parse for *_, parse in order_keys])
+        conds.append(keyset_after([(col, v, desc) for (col, _, desc, _), v in zip(order_keys, after)]))
+        offset = 0
 
+    cols = [
+        co.other_id.label("id"),
+        User.full_name,
+        User.username,
+        User.city,
+        User.avatar_url,
+        co.events_together,
+        co.last_seen_at,
+    ]
+    stmt = select(*cols, UserNote.text.label("note") if with_notes else null().label("note")).join(User, User.id == co.other_id)
+    if with_notes:
+        stmt = stmt.outerjoin(UserNote, and_(UserNote.owner_id == current.id, UserNote.target_user_id == co.other_id))
     stmt = (
-        select(
-            u2.id.label("id"),
-            u2.full_name.label("full_name"),
-            u2.username.label("username"),
-            u2.city.label("city"),
-            u2.avatar_url.label("avatar_url"),
-            func.count(func.distinct(Event.id)).label("events_together"),
-            func.max(Event.date_time).label("last_seen_at"),
-        )
-        .select_from(ep1)
-        .join(Event, Event.id == ep1.event_id)
-        .join(ep2, and_(ep2.event_id == ep1.event_id, ep2.user_id != ep1.user_id))
-        .join(u2, u2.id == ep2.user_id)
-        .where(
-            and_(
-                ep1.user_id == current.id,
-                ep1.status == ParticipationStatus.joined,
-                ep2.status == ParticipationStatus.joined,
-                Event.date_time < _now_utc(),  
-                ep1.is_visible == True,
-                ep2.is_visible == True,
-            )
-        )
-        .group_by(u2.id, u2.full_name, u2.username, u2.city, u2.avatar_url)
-        .order_by(func.max(Event.date_time).desc(), func.count(func.distinct(Event.id)).desc(), u2.id.asc())
-        .limit(limit)
+        stmt
+        .where(and_(*conds))
+        .order_by(*[col.desc() if desc else col.asc() for col, _, desc, _ in order_keys])
+        .limit(limit + 1)
         .offset(offset)
     )
 
     rows = db.execute(stmt).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*[getattr(last, name) for _, name, _, _ in order_keys])
+
     return [
         PeopleHistoryItemOut(
             id=r.id,
@@ -70,6 +78,7 @@ def my_people_history(
             avatar_url=r.avatar_url,
             events_together=r.events_together,
             last_seen_at=r.last_seen_at,
+            note=r.note,
         )
         for r in rows
-    ]
\ No newline at end of file
+    ]
@@ -1,10 +1,12 @@
 from datetime import datetime, timezone
-from fastapi import HTTPException, Depends, APIRouter, status
-from sqlalchemy.orm import Session, aliased
-from sqlalchemy import and_, select, func
-from app.api.deps import get_db, get_current_user
+from fastapi import HTTPException, Depends, APIRouter, Query, status
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, delete, exists, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.api.deps import get_db, get_current_identity
+from app.api.ids import parse_id_list
 from app.models import (
-    User, Event, EventParticipant, ParticipationStatus, UserNote
+    User, CoAttendance, UserNote, UserNoteDeletion
 )
 from app.schemas.notes import NoteIn, NoteOut
 
@@ -13,31 +15,29 @@ router = APIRouter()
 def _now_utc(): return datetime.now(timezone.utc)
 
 def _met_before(db: Session, me_id: int, other_id: int) -> bool:
-    e = Event
-    ep_me = aliased(EventParticipant)
-    ep_other = aliased(EventParticipant)
-    stmt = (
-        select(func.count())
-        .select_from(e)
-        .join(ep_me, ep_me.event_id == e.id)
-        .join(ep_other, ep_other.event_id == e.id)
-        .where(
-            and_(
-                ep_me.user_id == me_id,
-                ep_me.status == ParticipationStatus.joined,
-                ep_other.user_id == other_id,
-                ep_other.status == ParticipationStatus.joined,
-                e.date_time < _now_utc(),
-            )
-        )
-    )
+    stmt = select(exists().where(and_(CoAttendance.user_id == me_id, CoAttendance.other_id == other_id)))
     return bool(db.scalar(stmt))
 
+@router.get("/notes", response_model=list[NoteOut])
+def get_my_notes(
+    target_ids: str = Query(..., max_length=4000),
+    db: Session = Depends(get_db),
+    current = Depends(get_current_identity),
+):
+    # одна выборка по ix_user_notes_owner_target; у кого заметки нет — в ответе его просто нет
+    ids = parse_id_list(target_ids, name="target_ids")
+    rows = db.execute(
+        select(UserNote.target_user_id, UserNote.text, UserNote.updated_at).where(
+            and_(UserNote.owner_id == current.id, UserNote.target_user_id.in_(ids))
+        )
+    ).all()
+    return [NoteOut(target_user_id=r.target_user_id, text=r.text, updated_at=r.updated_at) for r in rows]
+
 @router.get("/users/{target_user_id}/note", response_model=NoteOut)
 def get_my_note(
     target_user_id: int,
     db: Session = Depends(get_db),
-    current = Depends(get_current_user),
+    current = Depends(get_current_identity),
 ):
     if target_user_id == current.id:
         raise HTTPException(400, "cannot note yourself")
@@ -58,7 +58,7 @@ def upsert_my_note(
     target_user_id: int,
     payload: NoteIn,
     db: Session = Depends(get_db),
-    current = Depends(get_current_user),
+    current = Depends(get_current_identity),
 ):
     if target_user_id == current.id:
         raise HTTPException(400, "cannot note yourself")
@@ -88,6 +88,11 @@ def upsert_my_note(
     else:
         note.text = payload.text.strip()
         note.updated_at = _now_utc()
+    db.execute(
+        delete(UserNoteDeletion).where(
+            and_(UserNoteDeletion.owner_id == current.id, UserNoteDeletion.target_user_id == target_user_id)
+        )
+    )
 
     db.commit()
     db.refresh(note)
@@ -98,7 +103,7 @@ def upsert_my_note(
 def delete_my_note(
     target_user_id: int,
     db: Session = Depends(get_db),
-    current = Depends(get_current_user)
+    current = Depends(get_current_identity)
 ):
     if target_user_id == current.id:
         raise HTTPException(400, "cannot note yourself")
@@ -112,4 +117,13 @@ def delete_my_note(
         return
     
     db.delete(note)
+    # надгробие для /sync
+    db.execute(
+        pg_insert(UserNoteDeletion)
+        .values(owner_id=current.id, target_user_id=target_user_id, deleted_at=_now_utc())
+        .on_conflict_do_update(
+            index_elements=[UserNoteDeletion.owner_id, UserNoteDeletion.target_user_id],
+            set_={"deleted_at": _now_utc()},
+        )
+    )
     db.commit()
\ No newline at end of file
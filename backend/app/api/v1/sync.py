@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_identity, get_db
+from app.api.pagination import decode_cursor, encode_cursor, parse_dt
+from app.models import Event, EventParticipant, UserNote, UserNoteDeletion
+from app.models.city import city_key_of
+from app.schemas.notes import NoteOut
+from app.schemas.sync import SyncOut, SyncParticipationOut
+from app.services.event_cache import card_out, joined_event_ids, load_event_cards
+from app.services.user_cache import CurrentIdentity
+
+router = APIRouter()
+
+# updated_at ставится временем начала транзакции: запись, закоммиченная чуть позже выдачи
+# watermark, получит метку раньше него. Перекрытие ловит такие записи (клиент применяет повторы идемпотентно).
+SYNC_OVERLAP = timedelta(seconds=30)
+SYNC_MAX_AGE = timedelta(days=7)
+SYNC_MAX_ITEMS = 500
+
+@router.get("/sync", response_model=SyncOut)
+def delta_sync(
+    since: Optional[str] = Query(None, max_length=200),
+    city: Optional[str] = Query(None, max_length=100),
+    db: Session = Depends(get_db),
+    current: CurrentIdentity = Depends(get_current_identity),
+):
+    # часы БД: с ними сравниваются updated_at событий и участий
+    now: datetime = db.scalar(select(func.now()))
+    watermark = encode_cursor(now)
+    if not since:
+        return SyncOut(watermark=watermark, full_resync=True)
+    (since_at,) = decode_cursor(since, parse_dt)
+    # watermark выдаём только с таймзоной; naive или «из будущего» — не наш, отдаём полную пересинхронизацию
+    if since_at.tzinfo is None or since_at > now or now - since_at > SYNC_MAX_AGE:
+        return SyncOut(watermark=watermark, full_resync=True)
+    cutoff = since_at - SYNC_OVERLAP
+
+    ep = EventParticipant
+    participations = db.execute(
+        select(ep.event_id, ep.status, ep.is_visible, ep.updated_at)
+        .where(and_(ep.user_id == current.id, ep.updated_at > cutoff))
+        .order_by(ep.updated_at, ep.event_id)
+        .limit(SYNC_MAX_ITEMS + 1)
+    ).all()
+
+    # без фильтра по дате: событие, ставшее past за окно, тоже должно прийти — иначе у клиента останется open/closed
+    conds = [Event.updated_at > cutoff]
+    if city and city.strip():
+        conds.append(Event.city_key == city_key_of(city))
+    event_ids = list(db.scalars(
+        select(Event.id).where(and_(*conds)).order_by(Event.updated_at, Event.id).limit(SYNC_MAX_ITEMS + 1)
+    ))
+
+    notes = db.execute(
+        select(UserNote.target_user_id, UserNote.text, UserNote.updated_at)
+        .where(and_(UserNote.owner_id == current.id, UserNote.updated_at > cutoff))
+        .limit(SYNC_MAX_ITEMS + 1)
+    ).all()
+    deleted = list(db.scalars(
+        select(UserNoteDeletion.target_user_id)
+        .where(and_(UserNoteDeletion.owner_id == current.id, UserNoteDeletion.deleted_at > cutoff))
+        .limit(SYNC_MAX_ITEMS + 1)
+    ))
+
+    if any(len(x) > SYNC_MAX_ITEMS for x in (participations, event_ids, notes, deleted)):
+        return SyncOut(watermark=watermark, full_resync=True)
+
+    # карточки — для изменившихся событий и для тех, где изменилось моё участие
+    ids = list(dict.fromkeys([*event_ids, *(p.event_id for p in participations)]))
+    cards = load_event_cards(db, ids)
+    joined = joined_event_ids(db, current.id, ids)
+
+    return SyncOut(
+        watermark=watermark,
+        events=[card_out(cards[i], i in joined) for i in ids if i in cards],
+        participations=[
+            SyncParticipationOut(event_id=p.event_id, status=p.status.value, is_visible=p.is_visible, updated_at=p.updated_at)
+            for p in participations
+        ],
+        notes=[NoteOut(target_user_id=n.target_user_id, text=n.text, updated_at=n.updated_at) for n in notes],
+        deleted_note_target_ids=deleted,
+    )
@@ -2,15 +2,21 @@ from typing import Optional
 from datetime import datetime, timezone
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select, func, and_, literal
-from sqlalchemy.orm import Session, aliased
+from sqlalchemy import select, func, and_
+from sqlalchemy.orm import Session
 
-from app.api.deps import get_db, get_current_user, assert_can_manage_roles
+from app.api.deps import get_db, get_current_identity, get_current_user, assert_can_manage_roles
+from app.api.ids import parse_id_list
 from app.models.user import User, UserGender, UserRole
-from app.models.event_participant import EventParticipant, ParticipationStatus
-from app.models.event import Event
-from app.schemas.users import GenderUpdateIn, MeOut, UserUpdateIn, UserPublicOut, CityUpdateIn, RoleUpdateIn
+from app.models.co_attendance import CoAttendance
+from app.models.user_suggestion import UserSuggestion
+from app.models.event_participant import ParticipationStatus
+from app.schemas.users import GenderUpdateIn, MeOut, UserUpdateIn, UserPublicOut, CityUpdateIn, RoleUpdateIn, SuggestionOut
 from app.schemas.events import EventCardOut
+from app.services.archive import participations
+from app.services.event_cache import card_out, load_event_cards
+from app.core.security import revoke_tokens
+from app.services.user_cache import CurrentIdentity, invalidate_user
 
 router = APIRouter()
 
@@ -25,10 +31,10 @@ def get_me(
     db: Session = Depends(get_db),
     current: User = Depends(get_current_user)
 ) -> MeOut:
-    ep = EventParticipant
+    ep = participations()
     total = db.scalar(
         select(func.count()).select_from(ep).where(
-            and_(ep.user_id == current.id, ep.status == ParticipationStatus.joined)
+            and_(ep.c.user_id == current.id, ep.c.status == ParticipationStatus.joined)
         )
     ) or 0
     return MeOut(
@@ -51,6 +57,7 @@ def set_gender(
     current.gender = payload.gender
     db.add(current)
     db.commit()
+    invalidate_user(current.id)
     db.refresh(current)
     return get_me(db, current)
 
@@ -63,6 +70,7 @@ def set_city(
     current.city = payload.city
     db.add(current)
     db.commit()
+    invalidate_user(current.id)
     db.refresh(current)
     return get_me(db, current)
 
@@ -84,57 +92,88 @@ def update_me(
     if changed:
         db.add(current)
         db.commit()
+        invalidate_user(current.id)
         db.refresh(current)
     return get_me(db, current)
 
 @router.get("/users/me/events", response_model=list[EventCardOut])
 def my_events(
     db: Session = Depends(get_db),
-    current: User = Depends(get_current_user),
+    current: CurrentIdentity = Depends(get_current_identity),
     status: Optional[str] = Query(None, regex="^(past|future|all)$"),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
 ):
-    ep = EventParticipant
-
-    sub_count = (
-        select(func.count())
-        .where(and_(ep.event_id == Event.id, ep.status == ParticipationStatus.joined))
-        .correlate(Event).scalar_subquery()
-    )
-    is_joined = (
-        select(literal(True))
-        .where(and_(ep.event_id == Event.id, ep.user_id == current.id, ep.status == ParticipationStatus.joined))
-        .correlate(Event).exists()
-    )
+    # будущие события в архиве не бывают — ему достаточно горячих таблиц
+    ep = participations(include_archive=status != "future")
 
     stmt = (
-        select(
-            Event.id, Event.title, Event.location, Event.city, Event.date_time,
-            Event.gender_restriction, Event.creator_id, Event.photo_url,
-            Event.status, Event.max_participants,
-            sub_count.label("participants_count"),
-            is_joined.label("is_user_joined"),
-        )
-        .join(ep, ep.event_id == Event.id)
-        .where(and_(ep.user_id == current.id, ep.status == ParticipationStatus.joined))
+        select(ep.c.event_id)
+        .where(and_(ep.c.user_id == current.id, ep.c.status == ParticipationStatus.joined))
     )
 
     now = datetime.now(timezone.utc)
     if status == "past":
-        stmt = stmt.where(Event.date_time < now)
+        stmt = stmt.where(ep.c.date_time < now)
     elif status == "future":
-        stmt = stmt.where(Event.date_time >= now)
+        stmt = stmt.where(ep.c.date_time >= now)
 
-    stmt = stmt.order_by(Event.date_time.desc()).limit(limit).offset(offset)
+    stmt = stmt.order_by(ep.c.date_time.desc()).limit(limit).offset(offset)
 
-    rows = db.execute(stmt).all()
+    ids = list(db.scalars(stmt))
+    cards = load_event_cards(db, ids)
+    # выборка уже идёт по участию пользователя — каждая строка joined, отдельная проверка не нужна
+    return [card_out(cards[i], True) for i in ids if i in cards]
+
+@router.get("/users", response_model=list[UserPublicOut])
+def get_public_users(
+    ids: str = Query(..., max_length=4000),
+    db: Session = Depends(get_db),
+    current: CurrentIdentity = Depends(get_current_identity),
+):
+    # профили одним запросом, events_together — одним запросом по co_attendance; порядок как в ids
+    wanted = parse_id_list(ids)
+    users = {
+        u.id: u for u in db.execute(
+            select(User.id, User.username, User.full_name, User.avatar_url, User.city).where(User.id.in_(wanted))
+        ).all()
+    }
+    together = dict(db.execute(
+        select(CoAttendance.other_id, CoAttendance.events_together).where(
+            and_(CoAttendance.user_id == current.id, CoAttendance.other_id.in_(list(users)))
+        )
+    ).all()) if users else {}
     return [
-        EventCardOut(
-            id=r.id, title=r.title, location=r.location, city=r.city, date_time=r.date_time,
-            gender_restriction=r.gender_restriction, creator_id=r.creator_id,
-            participants_count=r.participants_count, is_user_joined=bool(r.is_user_joined),
-            photo_url=r.photo_url, status=r.status, max_participants=r.max_participants,
+        UserPublicOut(
+            id=u.id,
+            username=u.username,
+            full_name=u.full_name,
+            avatar_url=u.avatar_url,
+            city=u.city,
+            events_together=together.get(u.id, 0),
+        )
+        for u in (users[i] for i in wanted if i in users)
+    ]
+
+@router.get("/users/me/suggestions", response_model=list[SuggestionOut])
+def my_suggestions(
+    db: Session = Depends(get_db),
+    current: CurrentIdentity = Depends(get_current_identity),
+    limit: int = Query(20, ge=1, le=30),
+):
+    # готовый top-K из user_suggestions: чтение по индексу, граф не обходится
+    s = UserSuggestion
+    rows = db.execute(
+        select(User.id, User.username, User.full_name, User.avatar_url, User.city, s.mutual_count, s.score)
+        .join(User, User.id == s.candidate_id)
+        .where(s.user_id == current.id)
+        .order_by(s.score.desc(), s.candidate_id.asc())
+        .limit(limit)
+    ).all()
+    return [
+        SuggestionOut(
+            id=r.id, username=r.username, full_name=r.full_name, avatar_url=r.avatar_url,
+            city=r.city, mutual_count=r.mutual_count, score=r.score,
         )
         for r in rows
     ]
@@ -143,7 +182,7 @@ def my_events(
 def get_public_user(
     user_id: int,
     db: Session = Depends(get_db),
-    current: User = Depends(get_current_user),
+    current: CurrentIdentity = Depends(get_current_identity),
 ):
     target = db.get(User, user_id)
     if not target:
@@ -151,23 +190,9 @@ def get_public_user(
     if target.id == current.id:
         pass
 
-    ep1 = aliased(EventParticipant)
-    ep2 = aliased(EventParticipant)
-
     events_together = db.scalar(
-        select(func.count(func.distinct(Event.id)))
-        .join(ep1, ep1.event_id == Event.id)
-        .join(ep2, ep2.event_id == Event.id)
-        .where(
-            and_(
-                ep1.user_id == current.id,
-                ep1.status == ParticipationStatus.joined,
-                ep1.is_visible == True,  
-                ep2.user_id == target.id,
-                ep2.status == ParticipationStatus.joined,
-                ep2.is_visible == True,  
-                Event.date_time < _now_utc(),  
-            )
+        select(CoAttendance.events_together).where(
+            and_(CoAttendance.user_id == current.id, CoAttendance.other_id == target.id)
         )
     ) or 0
 
@@ -200,12 +225,14 @@ def update_role(
     target.role = UserRole(payload.role)
     db.add(target)
     db.commit()
+    invalidate_user(target.id)
+    revoke_tokens(target.id)
     db.refresh(target)
     
-    ep = EventParticipant
+    ep = participations()
     total = db.scalar(
         select(func.count()).select_from(ep).where(
-            and_(ep.user_id == current.id, ep.status == ParticipationStatus.joined)
+            and_(ep.c.user_id == current.id, ep.c.status == ParticipationStatus.joined)
         )
     ) or 0
     
@@ -1,5 +1,5 @@
 from functools import lru_cache
-from pydantic import AnyUrl, SecretStr, field_validator
+from pydantic import AnyUrl, SecretStr, field_validator, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import Literal
 
@@ -25,6 +25,17 @@ class Settings(BaseSettings):
     s3_public_base_url: str | None = None
     swift_public_base_url: str | None = None
 
+    cache_backend: Literal["memory", "redis"] = "memory"
+    redis_url: str | None = None
+    cache_ttl_seconds: float = 30.0
+    cache_max_entries: int = 10_000
+    user_cache_ttl_seconds: float = 60.0
+    token_cache_max_entries: int = 10_000
+
+    leader_poll_seconds: float = 5.0
+    archive_after_days: int = 30
+    image_workers: int = 2
+
     role_managers: list[int] = []
 
     @field_validator("role_managers", mode="before")
@@ -35,6 +46,13 @@ class Settings(BaseSettings):
         if isinstance(v, str):
             return [int(x.strip()) for x in v.split(",") if x.strip()]
         return v
+
+    @model_validator(mode="after")
+    def _redis_needs_url(self):
+        # без URL get_cache молча ушёл бы в локальный кэш — воркеры разошлись бы без единого предупреждения
+        if self.cache_backend == "redis" and not self.redis_url:
+            raise ValueError("CACHE_BACKEND=redis requires REDIS_URL")
+        return self
     
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -1,5 +1,9 @@
+import hashlib
 import os
-from typing import Optional
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
 from datetime import datetime, timedelta, timezone
 from jose import jwt, JWTError
 from app.core.config import settings
@@ -19,6 +23,82 @@ def create_access_token(sub: str, role: str) -> str:
     secret = settings.jwt_secret.get_secret_value()
     return jwt.encode(payload, secret, algorithm=ALGO)
 
+class VerifiedTokenCache:
+    """
+    LRU уже проверенных токенов: sha256(токен) -> claims до их exp.
+    Повторный запрос с тем же токеном не пересчитывает HMAC. Кэшируются только успешные проверки;
+    revoke(sub) выкидывает все токены субъекта (смена роли, выход).
+    """
+
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._data: OrderedDict[str, tuple[float | None, dict[str, Any]]] = OrderedDict()
+        self._by_sub: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(kind: str, token: str) -> str:
+        return kind + ":" + hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def _drop_locked(self, key: str) -> None:
+        item = self._data.pop(key, None)
+        if item is None:
+            return
+        sub = str(item[1].get("sub"))
+        keys = self._by_sub.get(sub)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_sub[sub]
+
+    def get(self, kind: str, token: str) -> dict[str, Any] | None:
+        key = self._key(kind, token)
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, claims = item
+            if expires_at is not None and expires_at <= time.time():
+                self._drop_locked(key)
+                return None
+            self._data.move_to_end(key)
+            return claims
+
+    def put(self, kind: str, token: str, claims: dict[str, Any]) -> None:
+        key = self._key(kind, token)
+        exp = claims.get("exp")
+        expires_at = float(exp) if isinstance(exp, (int, float)) else None
+        with self._lock:
+            self._drop_locked(key)
+            self._data[key] = (expires_at, claims)
+            self._by_sub.setdefault(str(claims.get("sub")), set()).add(key)
+            while len(self._data) > self.max_entries:
+                self._drop_locked(next(iter(self._data)))
+
+    def revoke(self, sub: str | int) -> None:
+        with self._lock:
+            for key in list(self._by_sub.get(str(sub), ())):
+                self._drop_locked(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._by_sub.clear()
+
+verified_tokens = VerifiedTokenCache(max_entries=settings.token_cache_max_entries)
+
+def revoke_tokens(sub: str | int) -> None:
+    """Хук отзыва: следующий запрос с токеном субъекта снова пройдёт полную проверку."""
+    verified_tokens.revoke(sub)
+
+def decode_access_token(token: str) -> dict[str, Any]:
+    """jwt.decode для пользовательских токенов через кэш проверенных. Ошибки — JWTError, как у jose."""
+    claims = verified_tokens.get("access", token)
+    if claims is None:
+        claims = jwt.decode(token, settings.jwt_secret.get_secret_value(), algorithms=[ALGO])
+        verified_tokens.put("access", token, claims)
+    return claims
+
 JWT_SECRET = os.getenv("JWT_SECRET", "")
 JWT_ISSUER = os.getenv("JWT_ISSUER", "duslar-bot")
 JWT_AUDIENCE = os.getenv("JWT_AUDIENCE", "admin")
@@ -32,16 +112,19 @@ def decode_admin_token(token: str) -> TokenData:
     if not JWT_SECRET:
         raise HTTPException(status_code=500, detail="JWT secret not configured")
 
-    try:
-        payload = jwt.decode(
-            token,
-            JWT_SECRET,
-            algorithms=["HS256"],
-            audience=JWT_AUDIENCE,
-            options={"require_aud": True, "require_exp": True},
-        )
-    except JWTError as e:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f"Invalid token: {e}")
+    payload = verified_tokens.get("admin", token)
+    if payload is None:
+        try:
+            payload = jwt.decode(
+                token,
+                JWT_SECRET,
+                algorithms=["HS256"],
+                audience=JWT_AUDIENCE,
+                options={"require_aud": True, "require_exp": True},
+            )
+        except JWTError as e:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f"Invalid token: {e}")
+        verified_tokens.put("admin", token, payload)
 
     iss = payload.get("iss")
     role = payload.get("role")
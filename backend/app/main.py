@@ -2,9 +2,22 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.api.v1 import api_router
+from app.api.pagination import NEXT_CURSOR_HEADER
+from app.api.etag import ETAG_HEADER
 from starlette.staticfiles import StaticFiles
 import os
-from app.services.maintenance import sync_event_statuses
+from app.services.maintenance import reconcile_joined_counts, sync_event_statuses
+from app.services.status_scheduler import status_scheduler
+from app.services.leader import LeaderElection, current_leader
+from app.services.archive import archive_past_events
+from app.services.suggestions import refresh_suggestions
+from app.services.images import shutdown_pool
+from app.services.cache import get_cache
+from app.db.session import engine
+from app.api.deps import get_db
+from app.core.deps import require_admin
+from fastapi import Depends
+from sqlalchemy.orm import Session
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 app = FastAPI(title="MuslimEvent API", version="0.1.0")
@@ -13,14 +26,38 @@ os.makedirs(settings.media_dir, exist_ok=True)
 
 scheduler = AsyncIOScheduler(timezone="UTC")
 
+
+def _on_elected():
+    # новый лидер сначала догоняет пропущенное, потом ставит таймер переходов
+    sync_event_statuses()
+    status_scheduler.schedule_next()
+
+
+leader = LeaderElection(engine, on_elected=_on_elected, on_lost=status_scheduler.cancel)
+
 @app.on_event("startup")
 async def _startup():
     from anyio.to_thread import run_sync
-    await run_sync(sync_event_statuses)
 
-    scheduler.add_job(lambda: sync_event_statuses(), "interval", minutes=2, id="sync-status")
+    get_cache()  # выбор бэкенда (и предупреждение про memory) — при старте, а не на первом запросе
+    status_scheduler.attach(scheduler, guard=lambda: leader.is_leader)
+    scheduler.add_job(leader.poll, "interval", seconds=settings.leader_poll_seconds, id="leader-election")
+    scheduler.add_job(leader.leader_only(sync_event_statuses), "interval", hours=1, id="sync-status")
+    scheduler.add_job(leader.leader_only(reconcile_joined_counts), "interval", minutes=30, id="reconcile-joined-counts")
+    scheduler.add_job(leader.leader_only(archive_past_events), "interval", hours=6, id="archive-past-events")
+    scheduler.add_job(leader.leader_only(refresh_suggestions), "interval", minutes=5, id="refresh-suggestions")
     scheduler.start()
 
+    await run_sync(leader.poll)
+
+@app.on_event("shutdown")
+async def _shutdown():
+    from anyio.to_thread import run_sync
+
+    scheduler.shutdown(wait=False)
+    await run_sync(leader.release)
+    shutdown_pool()
+
 app.mount("/media", StaticFiles(directory=settings.media_dir), name="media")
 
 origins = []
@@ -33,10 +70,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, ETAG_HEADER],
 )
 
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
+# хост, pid и адрес соединения с БД — только для админа
+@app.get("/health/leader")
+def health_leader(db: Session = Depends(get_db), admin=Depends(require_admin)):
+    return {
+        "worker_id": leader.worker_id,
+        "is_leader": leader.is_leader,
+        "leader": current_leader(db),
+    }
+
 app.include_router(api_router, prefix="/api/v1")
@@ -1,11 +1,17 @@
 from app.models.user import User, UserGender, UserRole
 from app.models.event import Event, Gender, EventStatus 
 from app.models.event_participant import EventParticipant, ParticipationStatus
-from .user_note import UserNote
+from app.models.event_archive import EventArchive, EventParticipantArchive
+from app.models.co_attendance import CoAttendance
+from app.models.user_suggestion import SuggestionDirty, UserSuggestion
+from app.models.media_object import MediaObject
+from .user_note import UserNote, UserNoteDeletion
 
 __all__ = [
     "User", "UserGender",
     "Event", "Gender", "EventStatus",
     "EventParticipant", "ParticipationStatus",
-    "UserNote", "UserRole"
+    "EventArchive", "EventParticipantArchive",
+    "CoAttendance", "UserSuggestion", "SuggestionDirty", "MediaObject",
+    "UserNote", "UserNoteDeletion", "UserRole"
 ]
\ No newline at end of file
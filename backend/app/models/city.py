@@ -0,0 +1,13 @@
+from sqlalchemy import Computed, func
+from sqlalchemy.sql.elements import ColumnElement
+
+# Канонический ключ города: без крайних пробелов, внутренние пробелы схлопнуты, нижний регистр.
+# Хранится как generated-колонка, поэтому заполняется при любой вставке/правке city.
+CITY_KEY_SQL = r"lower(regexp_replace(btrim(city), '\s+', ' ', 'g'))"
+
+def city_key_computed() -> Computed:
+    return Computed(CITY_KEY_SQL, persisted=True)
+
+def city_key_of(value: str) -> ColumnElement[str]:
+    """Тот же ключ для произвольного значения (фильтры запросов)."""
+    return func.lower(func.regexp_replace(func.btrim(value), r"\s+", " ", "g"))
@@ -0,0 +1,20 @@
+from datetime import datetime
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+class CoAttendance(Base):
+    """
+    Кто с кем был на прошедших событиях (оба joined и видимы). Хранится в обе стороны:
+    (a, b) и (b, a), так что выборки идут по префиксу user_id. Ведёт services/co_attendance.py.
+    """
+    __tablename__ = "co_attendance"
+
+    user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    other_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    events_together: Mapped[int] = mapped_column(Integer, nullable=False)
+    last_seen_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("idx_co_attendance_recent", "user_id", last_seen_at.desc(), events_together.desc(), "other_id"),
+    )
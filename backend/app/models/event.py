@@ -1,8 +1,10 @@
 import enum
 from datetime import datetime
-from sqlalchemy import BigInteger, DateTime, Enum, ForeignKey, Integer, Text, func
+from sqlalchemy import BigInteger, Computed, DateTime, Double, Enum, ForeignKey, Index, Integer, Text, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.db.base import Base
+from app.models.city import city_key_computed
+from app.services.geo import GEO_CELL_SQL
 
 class Gender(str, enum.Enum):
     male = "male"
@@ -26,8 +28,13 @@ class Event(Base):
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
     location: Mapped[str] = mapped_column(Text, nullable=False)
     city: Mapped[str] = mapped_column(Text, nullable=False)
+    city_key: Mapped[str] = mapped_column(Text, city_key_computed(), nullable=False)
     
     date_time: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    lat: Mapped[float | None] = mapped_column(Double, nullable=True)
+    lon: Mapped[float | None] = mapped_column(Double, nullable=True)
+    geo_cell: Mapped[int | None] = mapped_column(BigInteger, Computed(GEO_CELL_SQL, persisted=True), nullable=True)
     
     gender_restriction: Mapped[Gender] = mapped_column(
         Enum(Gender, name="gender_restriction"),
@@ -37,12 +44,20 @@ class Event(Base):
     
     
     max_participants: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    joined_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
     
     status: Mapped[EventStatus] = mapped_column(
         Enum(EventStatus, name="event_status"), nullable=False, default=EventStatus.open
     )
     
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # когда участники прошедшего события учтены в co_attendance (NULL — ещё нет)
+    pairs_counted_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("idx_events_updated", "updated_at", "id"),
+    )
     
     photo_url: Mapped[str | None] = mapped_column(Text, nullable=True)
     
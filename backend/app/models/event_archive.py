@@ -0,0 +1,67 @@
+from datetime import datetime
+from sqlalchemy import BigInteger, DateTime, Double, Enum, ForeignKey, Index, Integer, Text, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+from app.models.event import EventStatus, Gender
+from app.models.event_participant import ParticipationStatus
+
+# Архив прошедших событий: те же id и колонки, что в events/event_participants
+# (кроме вычисляемых city_key/geo_cell — по архиву не ищут). Переносит services/archive.py.
+
+class EventArchive(Base):
+    __tablename__ = "events_archive"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
+    creator_id: Mapped[int | None] = mapped_column(
+        BigInteger, ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
+
+    title: Mapped[str] = mapped_column(Text, nullable=False)
+    description: Mapped[str | None] = mapped_column(Text, nullable=True)
+    location: Mapped[str] = mapped_column(Text, nullable=False)
+    city: Mapped[str] = mapped_column(Text, nullable=False)
+
+    date_time: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    lat: Mapped[float | None] = mapped_column(Double, nullable=True)
+    lon: Mapped[float | None] = mapped_column(Double, nullable=True)
+
+    gender_restriction: Mapped[Gender] = mapped_column(
+        Enum(Gender, name="gender_restriction", create_type=False), nullable=False
+    )
+    max_participants: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    joined_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    status: Mapped[EventStatus] = mapped_column(
+        Enum(EventStatus, name="event_status", create_type=False), nullable=False
+    )
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    photo_url: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    __table_args__ = (
+        Index("idx_events_archive_date", "date_time"),
+    )
+
+
+class EventParticipantArchive(Base):
+    __tablename__ = "event_participants_archive"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
+    event_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("events_archive.id", ondelete="CASCADE"), nullable=False
+    )
+    user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+
+    is_visible: Mapped[bool] = mapped_column(nullable=False)
+    status: Mapped[ParticipationStatus] = mapped_column(
+        Enum(ParticipationStatus, name="participant_status", create_type=False), nullable=False
+    )
+    joined_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("event_id", "user_id", name="uq_event_user_archive"),
+        Index("idx_epa_user", "user_id"),
+    )
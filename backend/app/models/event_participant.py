@@ -1,6 +1,6 @@
 import enum
 from datetime import datetime
-from sqlalchemy import BigInteger, DateTime, Enum, ForeignKey, UniqueConstraint, Text, func
+from sqlalchemy import BigInteger, DateTime, Enum, ForeignKey, Index, UniqueConstraint, Text, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.db.base import Base
 
@@ -22,7 +22,9 @@ class EventParticipant(Base):
         nullable=False, default=ParticipationStatus.joined
     )
     joined_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     
     __table_args__ = (
         UniqueConstraint("event_id", "user_id", name="uq_event_user"),
+        Index("idx_ep_user_updated", "user_id", "updated_at"),
     )
\ No newline at end of file
@@ -0,0 +1,17 @@
+from datetime import datetime
+from sqlalchemy import BigInteger, DateTime, Integer, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+class MediaObject(Base):
+    """Индекс загруженных изображений по sha256 исходных байт; повторная загрузка — uploads + 1, без копии."""
+    __tablename__ = "media_objects"
+
+    sha256: Mapped[str] = mapped_column(Text, primary_key=True)
+    key_prefix: Mapped[str] = mapped_column(Text, nullable=False)
+    ext: Mapped[str] = mapped_column(Text, nullable=False)
+    content_type: Mapped[str] = mapped_column(Text, nullable=False)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    uploads: Mapped[int] = mapped_column(Integer, nullable=False, server_default="1")
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_uploaded_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -6,6 +6,7 @@ from sqlalchemy import BigInteger, DateTime, Enum, Integer, Text, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base import Base
+from app.models.city import city_key_computed
 
 class UserRole(str, enum.Enum):
     user = "user"
@@ -25,6 +26,7 @@ class User(Base):
     username: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     full_name: Mapped[str] = mapped_column(Text, nullable=False)
     city: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    city_key: Mapped[Optional[str]] = mapped_column(Text, city_key_computed(), nullable=True)
     gender: Mapped[UserGender] = mapped_column(
         Enum(UserGender, name="user_gender"),
         nullable=False,
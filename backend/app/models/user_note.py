@@ -25,4 +25,20 @@ class UserNote(Base):
     __table_args__ = (
         UniqueConstraint("owner_id", "target_user_id", name="ux_user_note_pair"),
         Index("ix_user_notes_owner_target", "owner_id", "target_user_id"),
+        Index("ix_user_notes_owner_updated", "owner_id", "updated_at"),
+    )
+
+
+class UserNoteDeletion(Base):
+    """Надгробие удалённой заметки — чтобы /sync мог сообщить об удалении."""
+    __tablename__ = "user_note_deletions"
+
+    owner_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    target_user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    deleted_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
+
+    __table_args__ = (
+        Index("ix_user_note_deletions_owner_deleted", "owner_id", "deleted_at"),
     )
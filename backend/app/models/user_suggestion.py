@@ -0,0 +1,26 @@
+from datetime import datetime
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, Integer, func
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+class UserSuggestion(Base):
+    """Top-K «возможно, вы знакомы» на пользователя; пересчитывает services/suggestions.py."""
+    __tablename__ = "user_suggestions"
+
+    user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    candidate_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    mutual_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    score: Mapped[int] = mapped_column(Integer, nullable=False)
+    computed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("idx_user_suggestions_rank", "user_id", score.desc(), "candidate_id"),
+    )
+
+
+class SuggestionDirty(Base):
+    """Очередь пользователей, чьи подсказки устарели (изменился их граф до второго круга)."""
+    __tablename__ = "suggestion_dirty"
+
+    user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    marked_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -3,6 +3,8 @@ from .events import (
     EventCardOut,
     EventOut,
     ParticipantOut,
+    EventFacetsOut,
+    FacetCountOut,
 )
 
 from .participants import (
@@ -26,6 +28,8 @@ __all__ = [
     "VisibilityUpdateIn",
     "VisibilityOut",
     "ParticipantOut",
+    "EventFacetsOut",
+    "FacetCountOut",
     "GenderUpdateIn",
     "UserGender",
     "PeopleHistoryItemOut",
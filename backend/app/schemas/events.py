@@ -1,5 +1,5 @@
 from datetime import datetime
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 from typing import Optional
 from enum import Enum
 
@@ -17,6 +17,8 @@ class EventCreate(BaseModel):
     gender_restriction: Gender = Gender.all
     max_participants: Optional[int] = None
     photo_url: str | None = None
+    lat: Optional[float] = Field(None, ge=-90, le=90)
+    lon: Optional[float] = Field(None, ge=-180, le=180)
 
     @field_validator("title")
     @classmethod
@@ -25,6 +27,17 @@ class EventCreate(BaseModel):
             raise ValueError("Название должно быть меньше 20 символов")
         return v
 
+    @model_validator(mode="after")
+    def coords_pair(self) -> "EventCreate":
+        if (self.lat is None) != (self.lon is None):
+            raise ValueError("Координаты указываются парой: lat и lon")
+        return self
+
+class PhotoVariantsOut(BaseModel):
+    card: str
+    detail: str
+    original: str
+
 class EventCardOut(BaseModel):
     id: int
     title: str
@@ -36,8 +49,12 @@ class EventCardOut(BaseModel):
     participants_count: int
     is_user_joined: bool
     photo_url: str | None = None
+    photo_variants: PhotoVariantsOut | None = None
     status: str
     max_participants: int | None = None
+    lat: float | None = None
+    lon: float | None = None
+    distance_km: float | None = None
 
 class EventOut(BaseModel):
     id: int
@@ -53,10 +70,25 @@ class EventOut(BaseModel):
     participants_count: int
     is_user_joined: bool
     photo_url: str | None = None
+    photo_variants: PhotoVariantsOut | None = None
+    lat: float | None = None
+    lon: float | None = None
+    distance_km: float | None = None
 
 class ParticipantOut(BaseModel):
     id: int
     username: str | None = None
     full_name: str
     is_visible: bool
-    avatar_url: str | None = None
\ No newline at end of file
+    avatar_url: str | None = None
+    note: str | None = None
+
+class FacetCountOut(BaseModel):
+    value: str
+    label: str | None = None
+    count: int
+
+class EventFacetsOut(BaseModel):
+    cities: list[FacetCountOut]
+    days: list[FacetCountOut]
+    genders: list[FacetCountOut]
@@ -9,4 +9,5 @@ class PeopleHistoryItemOut(BaseModel):
     avatar_url: str | None = None
     events_together: int
     last_seen_at: datetime | None = None
+    note: str | None = None
     
\ No newline at end of file
@@ -0,0 +1,20 @@
+from datetime import datetime
+from pydantic import BaseModel
+
+from app.schemas.events import EventCardOut
+from app.schemas.notes import NoteOut
+
+class SyncParticipationOut(BaseModel):
+    event_id: int
+    status: str
+    is_visible: bool
+    updated_at: datetime
+
+class SyncOut(BaseModel):
+    watermark: str
+    # True — дельту не отдать (нет/устарел since или изменений слишком много): перекачать списки целиком
+    full_resync: bool = False
+    events: list[EventCardOut] = []
+    participations: list[SyncParticipationOut] = []
+    notes: list[NoteOut] = []
+    deleted_note_target_ids: list[int] = []
@@ -40,4 +40,12 @@ class UserPublicOut(BaseModel):
     events_together: int
     
 class RoleUpdateIn(BaseModel):
-    role: Literal["user", "organizer", "admin"]
\ No newline at end of file
+    role: Literal["user", "organizer", "admin"]
+class SuggestionOut(BaseModel):
+    id: int
+    username: str | None = None
+    full_name: str
+    avatar_url: str | None = None
+    city: str | None = None
+    mutual_count: int
+    score: int
@@ -0,0 +1,120 @@
+"""
+Горячие/архивные таблицы событий.
+
+events/event_participants держат предстоящие и недавно прошедшие события — по ним идут лента,
+join/leave и смена статусов. Прошедшие старше settings.archive_after_days переносятся пачками
+в events_archive/event_participants_archive (id сохраняются). Чтение «по истории»
+(history/people, my_events?status=past, встречи для заметок) идёт через participations(),
+который объединяет обе части.
+"""
+from __future__ import annotations
+
+from datetime import timedelta
+
+from sqlalchemy import func, select, union_all
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Subquery
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.event import Event, EventStatus
+from app.models.event_archive import EventArchive, EventParticipantArchive
+from app.models.event_participant import EventParticipant
+from app.services.event_cache import invalidate_events
+
+_EVENT_COLUMNS = (
+    "id", "creator_id", "title", "description", "location", "city", "date_time", "lat", "lon",
+    "gender_restriction", "max_participants", "joined_count", "status", "created_at", "updated_at",
+    "photo_url",
+)
+_PARTICIPANT_COLUMNS = ("id", "event_id", "user_id", "is_visible", "status", "joined_at")
+
+
+def archive_past_events(
+    older_than: timedelta | None = None,
+    batch_size: int = 500,
+    session: Session | None = None,
+) -> int:
+    """
+    Переносит прошедшие события (и их участников) в архив пачками по batch_size,
+    каждая пачка — своя транзакция. Возвращает число перенесённых событий.
+    """
+    if older_than is None:
+        older_than = timedelta(days=settings.archive_after_days)
+
+    own_session = False
+    if session is None:
+        session = SessionLocal()
+        own_session = True
+
+    moved = 0
+    try:
+        while True:
+            ids = list(session.scalars(
+                select(Event.id)
+                .where(Event.status == EventStatus.past)
+                .where(Event.pairs_counted_at.is_not(None))
+                .where(Event.date_time < func.now() - older_than)
+                .order_by(Event.date_time)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            ))
+            if not ids:
+                break
+
+            session.execute(
+                EventArchive.__table__.insert().from_select(
+                    [*_EVENT_COLUMNS, "archived_at"],
+                    select(*[getattr(Event, c) for c in _EVENT_COLUMNS], func.now())
+                    .where(Event.id.in_(ids)),
+                )
+            )
+            session.execute(
+                EventParticipantArchive.__table__.insert().from_select(
+                    list(_PARTICIPANT_COLUMNS),
+                    select(*[getattr(EventParticipant, c) for c in _PARTICIPANT_COLUMNS])
+                    .where(EventParticipant.event_id.in_(ids)),
+                )
+            )
+            # участники уходят каскадом
+            session.execute(Event.__table__.delete().where(Event.id.in_(ids)))
+            session.commit()
+
+            invalidate_events(ids)
+            moved += len(ids)
+            if len(ids) < batch_size:
+                break
+        return moved
+    finally:
+        if own_session:
+            session.close()
+
+
+def participations(include_archive: bool = True) -> Subquery:
+    """
+    Участия вместе с датой события: (event_id, user_id, status, is_visible, date_time).
+    Фильтры снаружи Postgres проталкивает в обе ветви UNION ALL, так что каждая идёт по своим индексам.
+    """
+    ep, e = EventParticipant, Event
+    hot = (
+        select(ep.event_id, ep.user_id, ep.status, ep.is_visible, e.date_time)
+        .join(e, e.id == ep.event_id)
+    )
+    if not include_archive:
+        return hot.subquery("participations")
+
+    epa, ea = EventParticipantArchive, EventArchive
+    cold = (
+        select(epa.event_id, epa.user_id, epa.status, epa.is_visible, ea.date_time)
+        .join(ea, ea.id == epa.event_id)
+    )
+    return union_all(hot, cold).subquery("participations")
+
+
+def event_tables(db: Session, event_id: int) -> tuple[type, type] | None:
+    """(модель события, модель участников) для event_id — горячие или архивные; None, если события нет."""
+    if db.get(Event, event_id) is not None:
+        return Event, EventParticipant
+    if db.get(EventArchive, event_id) is not None:
+        return EventArchive, EventParticipantArchive
+    return None
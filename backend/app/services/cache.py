@@ -0,0 +1,144 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Iterable
+
+from app.core.config import settings
+
+log = logging.getLogger("cache")
+
+
+class Cache:
+    """
+    Минимальный интерфейс кэша. Значения — JSON-совместимые (dict/list/str/int/...),
+    чтобы локальный и общий бэкенды были взаимозаменяемы.
+    """
+    def get(self, key: str) -> Any | None: ...
+    def get_many(self, keys: Iterable[str]) -> dict[str, Any]: ...
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None: ...
+    def set_many(self, items: dict[str, Any], ttl: float | None = None) -> None: ...
+    def delete(self, *keys: str) -> None: ...
+    def incr(self, key: str) -> int: ...
+
+
+class MemoryCache(Cache):
+    """In-process LRU с TTL. Годится как локальная замена общему кэшу и для dev/тестов."""
+
+    def __init__(self, max_entries: int = 10_000, default_ttl: float = 30.0):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._data: OrderedDict[str, tuple[float | None, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_locked(self, key: str, now: float) -> Any | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at is not None and expires_at <= now:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def _set_locked(self, key: str, value: Any, ttl: float | None, now: float) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        self._data[key] = (now + ttl if ttl > 0 else None, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            return self._get_locked(key, time.monotonic())
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        now = time.monotonic()
+        out: dict[str, Any] = {}
+        with self._lock:
+            for key in keys:
+                value = self._get_locked(key, now)
+                if value is not None:
+                    out[key] = value
+        return out
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        with self._lock:
+            self._set_locked(key, value, ttl, time.monotonic())
+
+    def set_many(self, items: dict[str, Any], ttl: float | None = None) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for key, value in items.items():
+                self._set_locked(key, value, ttl, now)
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def incr(self, key: str) -> int:
+        # счётчики (поколения) живут без TTL
+        with self._lock:
+            value = int(self._get_locked(key, time.monotonic()) or 0) + 1
+            self._set_locked(key, value, 0, time.monotonic())
+            return value
+
+
+class RedisCache(Cache):
+    """Общий кэш для нескольких воркеров/инстансов."""
+
+    def __init__(self, url: str, default_ttl: float = 30.0, prefix: str = "duslar:"):
+        import redis
+
+        self.r = redis.Redis.from_url(url)
+        self.default_ttl = default_ttl
+        self.prefix = prefix
+
+    def _k(self, key: str) -> str:
+        return self.prefix + key
+
+    def get(self, key: str) -> Any | None:
+        raw = self.r.get(self._k(key))
+        return json.loads(raw) if raw is not None else None
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        raws = self.r.mget([self._k(k) for k in keys])
+        return {k: json.loads(raw) for k, raw in zip(keys, raws) if raw is not None}
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        self.r.set(self._k(key), json.dumps(value, separators=(",", ":")), px=int(ttl * 1000) if ttl > 0 else None)
+
+    def set_many(self, items: dict[str, Any], ttl: float | None = None) -> None:
+        if not items:
+            return
+        pipe = self.r.pipeline(transaction=False)
+        ttl = self.default_ttl if ttl is None else ttl
+        for key, value in items.items():
+            pipe.set(self._k(key), json.dumps(value, separators=(",", ":")), px=int(ttl * 1000) if ttl > 0 else None)
+        pipe.execute()
+
+    def delete(self, *keys: str) -> None:
+        if keys:
+            self.r.delete(*[self._k(k) for k in keys])
+
+    def incr(self, key: str) -> int:
+        return int(self.r.incr(self._k(key)))
+
+
+@lru_cache
+def get_cache() -> Cache:
+    if settings.cache_backend == "redis":
+        return RedisCache(settings.redis_url, default_ttl=settings.cache_ttl_seconds)
+    log.warning(
+        "CACHE_BACKEND=memory: invalidation (incl. leader jobs) reaches only this process; "
+        "with several workers use CACHE_BACKEND=redis"
+    )
+    return MemoryCache(max_entries=settings.cache_max_entries, default_ttl=settings.cache_ttl_seconds)
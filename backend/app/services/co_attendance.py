@@ -0,0 +1,115 @@
+"""
+Граф совместных посещений: co_attendance(user_id, other_id, events_together, last_seen_at).
+
+- record_past_events — прошедшие события, ещё не учтённые (pairs_counted_at IS NULL), помечаются
+  и добавляют +1 каждой паре видимых участников. Пометка и добавление в одной транзакции,
+  поэтому событие учитывается ровно один раз, каким бы путём оно ни стало past.
+- refresh_pairs — точный пересчёт пар одного пользователя (смена видимости на учтённом событии).
+
+Оба пути ставят затронутых пользователей в очередь пересчёта подсказок (services/suggestions.py).
+"""
+from __future__ import annotations
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.models.event import Event, EventStatus
+from app.services.suggestions import mark_dirty
+
+_ADD_PAIRS_SQL = text("""
+    INSERT INTO co_attendance (user_id, other_id, events_together, last_seen_at)
+    SELECT p1.user_id, p2.user_id, count(*), max(e.date_time)
+    FROM event_participants p1
+    JOIN event_participants p2 ON p2.event_id = p1.event_id AND p2.user_id <> p1.user_id
+    JOIN events e ON e.id = p1.event_id
+    WHERE p1.event_id = ANY(:ids)
+      AND p1.status = 'joined' AND p1.is_visible
+      AND p2.status = 'joined' AND p2.is_visible
+    GROUP BY p1.user_id, p2.user_id
+    ON CONFLICT (user_id, other_id) DO UPDATE
+        SET events_together = co_attendance.events_together + EXCLUDED.events_together,
+            last_seen_at = GREATEST(co_attendance.last_seen_at, EXCLUDED.last_seen_at)
+""")
+
+_EVENT_USERS_SQL = text("""
+    SELECT DISTINCT user_id FROM event_participants
+    WHERE event_id = ANY(:ids) AND status = 'joined' AND is_visible
+""")
+
+_DELETE_PAIRS_SQL = text("""
+    DELETE FROM co_attendance
+    WHERE (user_id = :u AND other_id = ANY(:others))
+       OR (other_id = :u AND user_id = ANY(:others))
+""")
+
+# учтённые события: горячие с pairs_counted_at и весь архив.
+# NOT MATERIALIZED — чтобы фильтры по user_id дошли до индексов обеих ветвей
+_REFILL_PAIRS_SQL = text("""
+    WITH counted AS NOT MATERIALIZED (
+        SELECT ep.event_id, ep.user_id, e.date_time
+        FROM event_participants ep JOIN events e ON e.id = ep.event_id
+        WHERE e.pairs_counted_at IS NOT NULL AND ep.status = 'joined' AND ep.is_visible
+        UNION ALL
+        SELECT epa.event_id, epa.user_id, ea.date_time
+        FROM event_participants_archive epa JOIN events_archive ea ON ea.id = epa.event_id
+        WHERE epa.status = 'joined' AND epa.is_visible
+    ),
+    pairs AS (
+        SELECT other.user_id AS other_id, count(*) AS n, max(me.date_time) AS last_seen_at
+        FROM counted me JOIN counted other ON other.event_id = me.event_id
+        WHERE me.user_id = :u AND other.user_id = ANY(:others)
+        GROUP BY other.user_id
+    )
+    INSERT INTO co_attendance (user_id, other_id, events_together, last_seen_at)
+    SELECT :u, other_id, n, last_seen_at FROM pairs
+    UNION ALL
+    SELECT other_id, :u, n, last_seen_at FROM pairs
+""")
+
+
+def record_past_events(session: Session | None = None, batch_size: int = 200) -> int:
+    """Учитывает в графе прошедшие события пачками. Возвращает число учтённых событий."""
+    own_session = False
+    if session is None:
+        session = SessionLocal()
+        own_session = True
+
+    done = 0
+    try:
+        while True:
+            pending = (
+                select(Event.id)
+                .where(Event.status == EventStatus.past, Event.pairs_counted_at.is_(None))
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            ids = session.scalars(
+                update(Event)
+                .where(Event.id.in_(pending.scalar_subquery()))
+                .values(pairs_counted_at=func.now())
+                .returning(Event.id)
+                .execution_options(synchronize_session=False)
+            ).all()
+            if not ids:
+                break
+            session.execute(_ADD_PAIRS_SQL, {"ids": list(ids)})
+            mark_dirty(session, list(session.scalars(_EVENT_USERS_SQL, {"ids": list(ids)})))
+            session.commit()
+            done += len(ids)
+            if len(ids) < batch_size:
+                break
+        return done
+    finally:
+        if own_session:
+            session.close()
+
+
+def refresh_pairs(db: Session, user_id: int, others: list[int]) -> None:
+    """Пересчитывает пары (user_id, x) и (x, user_id) по учтённой истории. Без commit."""
+    if not others:
+        return
+    params = {"u": user_id, "others": others}
+    db.execute(_DELETE_PAIRS_SQL, params)
+    db.execute(_REFILL_PAIRS_SQL, params)
+    mark_dirty(db, [user_id, *others])
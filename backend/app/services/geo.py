@@ -0,0 +1,61 @@
+"""
+Гео-поиск без PostGIS: сетка из ячеек GEO_STEP градусов.
+events.geo_cell = номер ячейки (generated-колонка), по нему btree-индекс (geo_cell, date_time).
+Запрос «рядом» = несколько диапазонов geo_cell (по одному на ряд сетки) + точная дистанция в SQL.
+"""
+import math
+
+from sqlalchemy import func
+from sqlalchemy.sql.elements import ColumnElement
+
+GEO_STEP = 0.05                        # ~5.5 км по широте
+GEO_COLS = math.ceil(360 / GEO_STEP)   # ячеек в одном ряду
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG_LAT = 111.32
+
+GEO_CELL_SQL = (
+    f"floor((lat + 90) / {GEO_STEP})::bigint * {GEO_COLS} + floor((lon + 180) / {GEO_STEP})::bigint"
+)
+
+
+def _row(lat: float) -> int:
+    return math.floor((lat + 90) / GEO_STEP)
+
+
+def _col(lon: float) -> int:
+    return math.floor((lon + 180) / GEO_STEP)
+
+
+def cell_ranges(lat: float, lon: float, radius_km: float) -> list[tuple[int, int]]:
+    """Диапазоны [lo, hi] номеров ячеек, покрывающие bbox круга радиуса radius_km."""
+    dlat = radius_km / KM_PER_DEG_LAT
+    lat_lo, lat_hi = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+    # долготу расширяем по самой «широкой» (ближней к экватору) границе bbox
+    widest = min(abs(lat_lo), abs(lat_hi)) if lat_lo * lat_hi > 0 else 0.0
+    cos_lat = max(math.cos(math.radians(widest)), 1e-6)
+    dlon = min(180.0, radius_km / (KM_PER_DEG_LAT * cos_lat))
+    col_lo, col_hi = _col(max(-180.0, lon - dlon)), _col(min(180.0, lon + dlon))
+    return [(r * GEO_COLS + col_lo, r * GEO_COLS + col_hi) for r in range(_row(lat_lo), _row(lat_hi) + 1)]
+
+
+def distance_km_sql(lat_col, lon_col, lat: float, lon: float) -> ColumnElement[float]:
+    """Гаверсинус в SQL (double precision)."""
+    dlat = func.radians(lat_col - lat) * 0.5
+    dlon = func.radians(lon_col - lon) * 0.5
+    a = func.power(func.sin(dlat), 2) + func.cos(math.radians(lat)) * func.cos(func.radians(lat_col)) * func.power(func.sin(dlon), 2)
+    return 2 * EARTH_RADIUS_KM * func.asin(func.least(1.0, func.sqrt(a)))
+
+
+def distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    dlat = math.radians(lat2 - lat1) / 2
+    dlon = math.radians(lon2 - lon1) / 2
+    a = math.sin(dlat) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def parse_near(value: str) -> tuple[float, float]:
+    lat_s, lon_s = value.split(",", 1)
+    lat, lon = float(lat_s), float(lon_s)
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError("out of range")
+    return lat, lon
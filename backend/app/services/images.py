@@ -0,0 +1,129 @@
+"""
+Производные изображения события: card (лента), detail (страница события), original.
+
+Загруженный файл перекодируется в отдельном процессе (ProcessPoolExecutor) — декодирование и
+ресайз упираются в CPU и GIL, в потоке запроса им не место. Все варианты пишутся без EXIF
+(геометка, модель телефона), ориентация из EXIF применяется заранее.
+
+Варианты лежат рядом под одним префиксом: <prefix>/original.<ext>, <prefix>/card.webp,
+<prefix>/detail.webp. photo_url события указывает на original, URL остальных выводятся из него
+(photo_variants) — ни БД, ни клиент не хранят их отдельно. Старые фото (до пайплайна) лежат
+плоским ключом и вариантов не имеют.
+"""
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PIL import Image, ImageOps
+
+from app.core.config import settings
+
+# имя -> (максимальная сторона, формат, качество)
+VARIANTS: dict[str, tuple[int, str, int]] = {
+    "card": (480, "WEBP", 75),
+    "detail": (1280, "WEBP", 80),
+}
+VARIANT_EXT = {"WEBP": ".webp", "JPEG": ".jpg", "PNG": ".png"}
+CONTENT_TYPES = {".webp": "image/webp", ".jpg": "image/jpeg", ".png": "image/png"}
+
+# original перекодируется в свой же формат, но не больше этой стороны
+ORIGINAL_MAX_SIDE = 2560
+MAX_PIXELS = 40_000_000
+
+_ORIGINAL_RE = re.compile(r"/original\.(jpg|png|webp)$")
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def _save(im: Image.Image, path: str, fmt: str, quality: int, icc: bytes | None) -> None:
+    if fmt == "JPEG" and im.mode not in ("RGB", "L"):
+        im = im.convert("RGB")
+    params: dict = {"optimize": True}
+    if fmt in ("JPEG", "WEBP"):
+        params["quality"] = quality
+    if fmt == "WEBP":
+        params["method"] = 4
+    if icc:
+        params["icc_profile"] = icc
+    # exif не передаём — Pillow его не переносит, метаданные остаются только в исходнике
+    im.save(path, fmt, **params)
+
+
+def render_variants(src: str, out_dir: str, ext: str) -> dict[str, str]:
+    """
+    Выполняется в дочернем процессе. Пишет варианты в out_dir и возвращает {имя: путь к файлу}.
+    Битое изображение или слишком большое по пикселям — ValueError.
+    """
+    try:
+        with Image.open(src) as raw:
+            # размеры из заголовка — до декодирования
+            if raw.width * raw.height > MAX_PIXELS:
+                raise ValueError("image is too large")
+            raw.load()
+            icc = raw.info.get("icc_profile")
+            im = ImageOps.exif_transpose(raw)
+            if im.mode not in ("RGB", "RGBA", "L"):
+                im = im.convert("RGBA" if "A" in im.getbands() or "transparency" in raw.info else "RGB")
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ValueError("broken image") from e
+
+    out: dict[str, str] = {}
+
+    original_fmt = {".jpg": "JPEG", ".png": "PNG", ".webp": "WEBP"}[ext]
+    original = im.copy()
+    original.thumbnail((ORIGINAL_MAX_SIDE, ORIGINAL_MAX_SIDE), Image.Resampling.LANCZOS)
+    out["original"] = os.path.join(out_dir, "original" + ext)
+    _save(original, out["original"], original_fmt, 90, icc)
+
+    for name, (side, fmt, quality) in VARIANTS.items():
+        v = im.copy()
+        v.thumbnail((side, side), Image.Resampling.LANCZOS)
+        out[name] = os.path.join(out_dir, name + VARIANT_EXT[fmt])
+        _save(v, out[name], fmt, quality, icc)
+    return out
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: воркер uvicorn уже держит потоки (планировщик, пул БД) — fork из такого процесса небезопасен
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.image_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def build_variants(src: str, out_dir: str, ext: str) -> dict[str, str]:
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(get_pool(), render_variants, src, out_dir, ext)
+    except BrokenProcessPool:
+        # дочерний процесс упал (OOM и т.п.) — пул больше не принимает задачи, пересоздаём при следующем вызове
+        shutdown_pool()
+        raise
+
+
+def photo_variants(photo_url: str | None) -> dict[str, str] | None:
+    """{card, detail, original} для фото из пайплайна; None — для старых фото и пустого photo_url."""
+    if not photo_url:
+        return None
+    m = _ORIGINAL_RE.search(photo_url)
+    if m is None:
+        return None
+    base = photo_url[: m.start()]
+    variants = {name: f"{base}/{name}{VARIANT_EXT[fmt]}" for name, (_, fmt, _) in VARIANTS.items()}
+    variants["original"] = photo_url
+    return variants
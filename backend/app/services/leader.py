@@ -0,0 +1,151 @@
+"""
+Выбор лидера среди воркеров для фоновых задач.
+
+Лидер — тот процесс, чьё выделенное соединение держит сессионный advisory lock.
+Остальные раз в poll_seconds пробуют pg_try_advisory_lock; если лидер умер, Postgres
+закрывает его соединение и освобождает lock — следующий опрос выбирает нового лидера.
+Лидер тем же опросом проверяет своё соединение: потерял его — снимает с себя роль.
+
+Ключ двухаргументный (classid, objid), чтобы не пересекаться с pg_advisory_xact_lock(event_id).
+Воркер подписывает соединение application_name, поэтому лидера видно из pg_stat_activity.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+from functools import wraps
+from typing import Any, Callable
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+log = logging.getLogger("leader")
+
+LOCK_CLASSID = 0x6475736C  # "dusl"
+LOCK_OBJID = 1             # фоновые задачи
+APP_NAME_PREFIX = "duslar-leader:"
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class LeaderElection:
+    def __init__(
+        self,
+        engine: Engine,
+        worker_id: str | None = None,
+        on_elected: Callable[[], None] | None = None,
+        on_lost: Callable[[], None] | None = None,
+    ):
+        self.engine = engine
+        self.worker_id = worker_id or default_worker_id()
+        self.on_elected = on_elected
+        self.on_lost = on_lost
+        self._conn: Connection | None = None
+        self._is_leader = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_leader(self) -> bool:
+        return self._is_leader
+
+    def _connect(self) -> Connection:
+        conn = self.engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        conn.execute(
+            text("SELECT set_config('application_name', :n, false)"),
+            {"n": (APP_NAME_PREFIX + self.worker_id)[:63]},
+        )
+        return conn
+
+    def _drop_connection(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.invalidate()
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    def poll(self) -> bool:
+        """Один шаг выборов: лидер проверяет соединение, остальные пробуют взять lock."""
+        with self._lock:
+            elected = lost = False
+            try:
+                if self._conn is None:
+                    self._conn = self._connect()
+                if self._is_leader:
+                    self._conn.execute(text("SELECT 1"))
+                else:
+                    got = self._conn.scalar(
+                        text("SELECT pg_try_advisory_lock(:c, :o)"),
+                        {"c": LOCK_CLASSID, "o": LOCK_OBJID},
+                    )
+                    if got:
+                        self._is_leader = elected = True
+            except Exception:
+                log.warning("leader connection failed (worker=%s)", self.worker_id, exc_info=True)
+                self._drop_connection()
+                lost = self._is_leader
+                self._is_leader = False
+
+        if elected:
+            log.info("worker %s became leader", self.worker_id)
+            if self.on_elected:
+                self.on_elected()
+        if lost:
+            log.warning("worker %s lost leadership", self.worker_id)
+            if self.on_lost:
+                self.on_lost()
+        return self._is_leader
+
+    def release(self) -> None:
+        with self._lock:
+            if self._conn is not None and self._is_leader:
+                try:
+                    self._conn.execute(
+                        text("SELECT pg_advisory_unlock(:c, :o)"),
+                        {"c": LOCK_CLASSID, "o": LOCK_OBJID},
+                    )
+                except Exception:
+                    pass
+            self._is_leader = False
+            # соединение подписано application_name — в пул его не возвращаем
+            self._drop_connection()
+
+    def leader_only(self, fn: Callable[..., Any]) -> Callable[..., Any]:
+        """Обёртка для задач планировщика: на не-лидере вызов пропускается."""
+        @wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not self._is_leader:
+                return None
+            return fn(*args, **kwargs)
+        return wrapper
+
+
+def current_leader(db: Session) -> dict[str, Any] | None:
+    """Кто сейчас держит lock: по pg_locks + pg_stat_activity, видно из любого воркера."""
+    row = db.execute(
+        text(
+            """
+            SELECT a.application_name, a.pid, a.client_addr, a.backend_start
+            FROM pg_locks l
+            JOIN pg_stat_activity a ON a.pid = l.pid
+            WHERE l.locktype = 'advisory' AND l.granted
+              AND l.classid = :c AND l.objid = :o AND l.objsubid = 2
+            """
+        ),
+        {"c": LOCK_CLASSID, "o": LOCK_OBJID},
+    ).first()
+    if row is None:
+        return None
+    name = row.application_name or ""
+    return {
+        "worker_id": name[len(APP_NAME_PREFIX):] if name.startswith(APP_NAME_PREFIX) else name,
+        "backend_pid": row.pid,
+        "client_addr": str(row.client_addr) if row.client_addr is not None else None,
+        "connected_at": row.backend_start,
+    }
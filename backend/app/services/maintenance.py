@@ -8,11 +8,12 @@ from sqlalchemy.orm import Session
 from app.db.session import SessionLocal
 from app.models.event import Event, EventStatus
 from app.models.event_participant import EventParticipant, ParticipationStatus
+from app.services.event_cache import invalidate_events, invalidate_facets
 
 
 def sync_event_statuses(session: Session | None = None) -> int:
     """
-    Прогон «всё и сразу»:
+    Ремонтный прогон «всё и сразу» (штатно статусы ведут join/leave и status_scheduler):
       1) переводим в past все события, у которых дата в прошлом;
       2) закрываем (closed) переполненные будущие/текущие;
       3) открываем (open) те, где снова есть место.
@@ -25,55 +26,122 @@ def sync_event_statuses(session: Session | None = None) -> int:
 
     try:
         now = datetime.now(timezone.utc)
+        changed: list[int] = []
 
-        parts_count = (
-            select(func.count())
-            .select_from(EventParticipant)
-            .where(EventParticipant.event_id == Event.id, EventParticipant.status==ParticipationStatus.joined)
-            .scalar_subquery()
-        )
-
-        session.execute(
+        changed += session.scalars(
             update(Event)
             .where(Event.status != EventStatus.past)
             .where(Event.date_time < now)
-            .values(status=EventStatus.past)
+            .values(status=EventStatus.past, updated_at=func.now())
+            .returning(Event.id)
         )
 
-        session.execute(
+        changed += session.scalars(
             update(Event)
             .where(Event.status == EventStatus.open)
             .where(Event.date_time >= now)
             .where(Event.max_participants.is_not(None))
-            .where(parts_count >= Event.max_participants)
-            .values(status=EventStatus.closed)
+            .where(Event.joined_count >= Event.max_participants)
+            .values(status=EventStatus.closed, updated_at=func.now())
+            .returning(Event.id)
         )
 
-        session.execute(
+        changed += session.scalars(
             update(Event)
             .where(Event.status == EventStatus.closed)
             .where(Event.date_time >= now)
             .where(Event.max_participants.is_not(None))
-            .where(parts_count < Event.max_participants)
-            .values(status=EventStatus.open)
+            .where(Event.joined_count < Event.max_participants)
+            .values(status=EventStatus.open, updated_at=func.now())
+            .returning(Event.id)
         )
 
         session.commit()
+        invalidate_events(changed)
+        if changed:
+            invalidate_facets()
         return 3
     finally:
         if own_session:
             session.close()
 
 
-def recompute_event_status(event_id: int, session: Session | None = None) -> EventStatus | None:
+def expire_due_events(session: Session | None = None) -> list[int]:
     """
-    Локальный пересчёт статуса для конкретного события (удобно дергать после join/leave).
-    Возвращает новый статус (или None, если событие не найдено).
-    Правила:
+    Переводит в past только события, время которых уже наступило.
+    Идёт по частичному индексу (date_time) WHERE status <> 'past', остальные строки не трогает.
+    Возвращает id переведённых событий.
+    """
+    own_session = False
+    if session is None:
+        session = SessionLocal()
+        own_session = True
+
+    try:
+        expired = session.scalars(
+            update(Event)
+            .where(Event.status != EventStatus.past)
+            .where(Event.date_time <= func.now())
+            .values(status=EventStatus.past, updated_at=func.now())
+            .returning(Event.id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        session.commit()
+        if expired:
+            invalidate_events(expired)
+            invalidate_facets()
+        return list(expired)
+    finally:
+        if own_session:
+            session.close()
+
+
+def next_transition_at(session: Session | None = None) -> datetime | None:
+    """Ближайший момент, когда какое-то событие должно стать past."""
+    own_session = False
+    if session is None:
+        session = SessionLocal()
+        own_session = True
+
+    try:
+        return session.scalar(select(func.min(Event.date_time)).where(Event.status != EventStatus.past))
+    finally:
+        if own_session:
+            session.close()
+
+
+def desired_status(ev: Event, joined_count: int, now: datetime | None = None) -> EventStatus:
+    """
+    Правила статуса:
       - если дата в прошлом -> past;
       - если есть max и count >= max -> closed;
       - иначе -> open.
     """
+    now = now or datetime.now(timezone.utc)
+    if ev.date_time < now:
+        return EventStatus.past
+    if ev.max_participants is not None and joined_count >= ev.max_participants:
+        return EventStatus.closed
+    return EventStatus.open
+
+
+def apply_event_status(ev: Event, joined_count: int) -> EventStatus:
+    """
+    Выставляет статус в транзакции вызывающего (без commit и без нового COUNT):
+    joined_count — уже посчитанное значение после изменения состава.
+    """
+    desired = desired_status(ev, joined_count)
+    if ev.status != desired:
+        ev.status = desired
+        ev.updated_at = func.now()
+    return desired
+
+
+def recompute_event_status(event_id: int, session: Session | None = None) -> EventStatus | None:
+    """
+    Самостоятельный пересчёт статуса одного события (для ремонтных задач).
+    Возвращает новый статус (или None, если событие не найдено).
+    """
     own_session = False
     if session is None:
         session = SessionLocal()
@@ -84,34 +152,58 @@ def recompute_event_status(event_id: int, session: Session | None = None) -> Eve
         if not ev:
             return None
 
-        now = datetime.now(timezone.utc)
-
-        if ev.date_time < now:
-            if ev.status != EventStatus.past:
-                ev.status = EventStatus.past
-                session.commit()
-            return ev.status
-
-        if ev.max_participants is not None:
-            cnt = session.scalar(
-                select(func.count())
-                .select_from(EventParticipant)
-                .where(
-                    EventParticipant.event_id == ev.id,
-                    EventParticipant.status == ParticipationStatus.joined,  
-                )
-            ) or 0
-            desired = EventStatus.closed if cnt >= ev.max_participants else EventStatus.open
-        
-            if ev.status != desired:
-                ev.status = desired
-                session.commit()
-            return ev.status
-
-        if ev.status != EventStatus.open:
-            ev.status = EventStatus.open
+        before = ev.status
+        status = apply_event_status(ev, ev.joined_count)
+        if status != before:
             session.commit()
-        return ev.status
+            invalidate_events([event_id])
+        return status
+    finally:
+        if own_session:
+            session.close()
+
+
+def reconcile_joined_counts(session: Session | None = None) -> int:
+    """
+    Сверка денормализованного events.joined_count с реальным числом joined-участников.
+    Чинит дрейф (ручные правки в БД, сбои между шагами и т.п.) и заодно пересчитывает статус.
+    Возвращает количество исправленных событий.
+
+    Кандидаты сначала блокируются (FOR UPDATE): join/leave меняют счётчик под блокировкой строки,
+    а пересчёт идёт уже следующим запросом — со свежим снимком, так что инкремент параллельного
+    join не затирается старым COUNT.
+    """
+    own_session = False
+    if session is None:
+        session = SessionLocal()
+        own_session = True
+
+    try:
+        actual = (
+            select(func.count())
+            .select_from(EventParticipant)
+            .where(EventParticipant.event_id == Event.id, EventParticipant.status == ParticipationStatus.joined)
+            .scalar_subquery()
+        )
+        ids = session.scalars(
+            select(Event.id)
+            .where(Event.joined_count != actual)
+            .order_by(Event.id)
+            .with_for_update(skip_locked=True)
+        ).all()
+
+        fixed: list[int] = []
+        if ids:
+            for ev, count in session.execute(select(Event, actual).where(Event.id.in_(ids))).all():
+                if ev.joined_count == count:
+                    continue
+                ev.joined_count = count
+                ev.updated_at = func.now()
+                apply_event_status(ev, count)
+                fixed.append(ev.id)
+        session.commit()
+        invalidate_events(fixed)
+        return len(fixed)
     finally:
         if own_session:
             session.close()
@@ -0,0 +1,81 @@
+"""
+Контентная адресация загруженных изображений.
+
+Префикс ключа — sha256 исходных байт (считается при приёме, services/upload.py):
+images/<sha[:2]>/<sha>/{original.<ext>, card.webp, detail.webp}. Повторная загрузка того же файла
+(афиша еженедельного события) находит готовые варианты — без перекодирования и без повторной
+выгрузки в хранилище. media_objects ведёт учёт дублей: сколько раз файл загружали и когда последний.
+
+original выгружается последним, поэтому его наличие в хранилище означает, что набор полный.
+"""
+from __future__ import annotations
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.models.media_object import MediaObject
+from app.services.images import VARIANT_EXT, VARIANTS
+from app.services.storage import Storage
+
+
+def content_prefix(sha256: str) -> str:
+    return f"images/{sha256[:2]}/{sha256}"
+
+
+def variant_keys(prefix: str, ext: str) -> dict[str, str]:
+    keys = {name: f"{prefix}/{name}{VARIANT_EXT[fmt]}" for name, (_, fmt, _) in VARIANTS.items()}
+    keys["original"] = f"{prefix}/original{ext}"
+    return keys
+
+
+def find_existing(storage: Storage, sha256: str, ext: str, session: Session | None = None) -> str | None:
+    """Префикс уже выгруженного набора для этих байт или None."""
+    own_session = False
+    if session is None:
+        session = SessionLocal()
+        own_session = True
+    try:
+        row = session.get(MediaObject, sha256)
+    finally:
+        if own_session:
+            session.close()
+
+    # индекс может разойтись с хранилищем (запись не дошла до commit, бакет почистили) —
+    # решает наличие original
+    prefix = row.key_prefix if row is not None else content_prefix(sha256)
+    if storage.exists(variant_keys(prefix, ext)["original"]):
+        return prefix
+    return None
+
+
+def register_upload(
+    sha256: str,
+    prefix: str,
+    ext: str,
+    content_type: str,
+    size: int,
+    session: Session | None = None,
+) -> None:
+    """Первая загрузка — новая строка, повторная — uploads + 1."""
+    own_session = False
+    if session is None:
+        session = SessionLocal()
+        own_session = True
+    try:
+        stmt = pg_insert(MediaObject).values(
+            sha256=sha256, key_prefix=prefix, ext=ext, content_type=content_type, size=size,
+        )
+        session.execute(stmt.on_conflict_do_update(
+            index_elements=[MediaObject.sha256],
+            set_={
+                "key_prefix": stmt.excluded.key_prefix,
+                "uploads": MediaObject.uploads + 1,
+                "last_uploaded_at": func.now(),
+            },
+        ))
+        session.commit()
+    finally:
+        if own_session:
+            session.close()
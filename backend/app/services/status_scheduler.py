@@ -0,0 +1,90 @@
+"""
+Планировщик перехода событий в past по времени.
+
+Вместо опроса всей таблицы держим одну date-задачу APScheduler на ближайший date_time
+среди непрошедших событий (частичный индекс по date_time WHERE status <> 'past').
+Задача переводит в past только наступившие события и планирует себя на следующий момент.
+Сон ограничен max_sleep: события, созданные в другом воркере, подхватятся не позже этого срока.
+С guard задача планируется и выполняется только там, где guard() истинен (в воркере-лидере).
+"""
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from apscheduler.schedulers.base import BaseScheduler
+
+from app.services.co_attendance import record_past_events
+from app.services.maintenance import expire_due_events, next_transition_at
+
+
+class StatusScheduler:
+    JOB_ID = "expire-past"
+
+    def __init__(self, max_sleep: timedelta = timedelta(seconds=60)):
+        self.max_sleep = max_sleep
+        self._scheduler: BaseScheduler | None = None
+        self._guard: Callable[[], bool] = lambda: True
+        self._next_run: datetime | None = None
+        self._lock = threading.Lock()
+
+    def attach(self, scheduler: BaseScheduler, guard: Callable[[], bool] | None = None) -> None:
+        self._scheduler = scheduler
+        if guard is not None:
+            self._guard = guard
+
+    def cancel(self) -> None:
+        if self._scheduler is None:
+            return
+        with self._lock:
+            self._next_run = None
+            if self._scheduler.get_job(self.JOB_ID):
+                self._scheduler.remove_job(self.JOB_ID)
+
+    @property
+    def next_run(self) -> datetime | None:
+        return self._next_run
+
+    def schedule_next(self) -> None:
+        if self._scheduler is None or not self._guard():
+            return
+        self._schedule(next_transition_at())
+
+    def notify(self, date_time: datetime) -> None:
+        """Новое/изменённое событие: если его момент раньше запланированного — перепланировать."""
+        if self._scheduler is None or not self._guard():
+            return
+        with self._lock:
+            sooner = self._next_run is None or date_time < self._next_run
+        if sooner:
+            self._schedule(date_time)
+
+    def _schedule(self, at: datetime | None) -> None:
+        if self._scheduler is None or not self._guard():
+            return
+        now = datetime.now(timezone.utc)
+        cap = now + self.max_sleep
+        run_at = cap if at is None else min(max(at, now), cap)
+        with self._lock:
+            self._next_run = run_at
+            self._scheduler.add_job(
+                self._run,
+                "date",
+                run_date=run_at,
+                id=self.JOB_ID,
+                replace_existing=True,
+                misfire_grace_time=None,
+                coalesce=True,
+            )
+
+    def _run(self) -> None:
+        if not self._guard():
+            return
+        try:
+            expire_due_events()
+            # сюда же попадают события, ставшие past в join/leave или ремонтном прогоне
+            record_past_events()
+        finally:
+            self.schedule_next()
+
+
+status_scheduler = StatusScheduler()
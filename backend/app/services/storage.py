@@ -1,10 +1,15 @@
-import os, uuid, mimetypes
+import os, shutil, uuid, mimetypes
 from typing import BinaryIO
 from datetime import datetime
 from app.core.config import settings
 
 class Storage:
     def save(self, stream: BinaryIO, filename: str, content_type: str | None) -> str: ...
+    def put_file(self, path: str, key: str, content_type: str | None) -> str: ...
+    def exists(self, key: str) -> bool: ...
+    def _url(self, key: str) -> str: ...
+    def url(self, key: str) -> str:
+        return self._url(key)
     def build_key(self, filename: str) -> str:
         ext = os.path.splitext(filename or "")[1].lower() or ".bin"
         today = datetime.utcnow().strftime("%Y/%m/%d")
@@ -25,6 +30,22 @@ class LocalStorage(Storage):
                 chunk = stream.read(1024 * 1024)
                 if not chunk: break
                 out.write(chunk)
+        return self._url(key)
+
+    def put_file(self, path: str, key: str, content_type: str | None) -> str:
+        dest = os.path.join(self.base_dir, key)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        # жёсткая ссылка, если временный файл на той же ФС, иначе копия; исходник удаляет вызывающий
+        try:
+            os.link(path, dest)
+        except OSError:
+            shutil.copyfile(path, dest)
+        return self._url(key)
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(os.path.join(self.base_dir, key))
+
+    def _url(self, key: str) -> str:
         if self.public_base:
             return f"{self.public_base.rstrip('/')}/{key}"
         return f"/media/{key}"
@@ -66,6 +87,26 @@ class S3Storage(Storage):
         except Exception as e:
             raise
         
+        return self._url(key)
+
+    def put_file(self, path: str, key: str, content_type: str | None) -> str:
+        ct = content_type or (mimetypes.guess_type(key)[0] or "application/octet-stream")
+        # upload_file сам делит большие файлы на multipart-части
+        self.s3.upload_file(Filename=path, Bucket=self.bucket, Key=key, ExtraArgs={"ContentType": ct})
+        return self._url(key)
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.s3.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+    def _url(self, key: str) -> str:
         if self.swift_public_base:
             return f"{self.swift_public_base.rstrip('/')}/{key}"
         if self.public_base:
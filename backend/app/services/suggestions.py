@@ -0,0 +1,97 @@
+"""
+«Возможно, вы знакомы»: контакты второго круга по графу co_attendance.
+
+Кандидат для u — тот, с кем был кто-то из контактов u, но не сам u. score — сумма
+min(events_together) по общим контактам, mutual_count — число общих контактов.
+Видимость уже учтена: в co_attendance попадают только видимые участия.
+
+Пересчёт инкрементальный: изменения графа (co_attendance) кладут в suggestion_dirty
+затронутых пользователей и их прямые контакты; refresh_suggestions разбирает очередь
+пачками и хранит не больше top_k строк на пользователя. Чтение — по индексу, без обхода графа.
+"""
+from __future__ import annotations
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+
+TOP_K = 30
+
+_MARK_DIRTY_SQL = text("""
+    INSERT INTO suggestion_dirty (user_id)
+    SELECT u FROM unnest(CAST(:users AS bigint[])) AS u
+    UNION
+    SELECT other_id FROM co_attendance WHERE user_id = ANY(:users)
+    ON CONFLICT (user_id) DO NOTHING
+""")
+
+_TAKE_DIRTY_SQL = text("""
+    DELETE FROM suggestion_dirty
+    WHERE user_id IN (
+        SELECT user_id FROM suggestion_dirty ORDER BY marked_at LIMIT :n FOR UPDATE SKIP LOCKED
+    )
+    RETURNING user_id
+""")
+
+_CLEAR_SQL = text("DELETE FROM user_suggestions WHERE user_id = ANY(:users)")
+
+_FILL_SQL = text("""
+    INSERT INTO user_suggestions (user_id, candidate_id, mutual_count, score, computed_at)
+    SELECT user_id, candidate_id, mutual_count, score, now()
+    FROM (
+        SELECT s.*, row_number() OVER (
+            PARTITION BY s.user_id ORDER BY s.score DESC, s.mutual_count DESC, s.candidate_id
+        ) AS rn
+        FROM (
+            SELECT c1.user_id, c2.other_id AS candidate_id,
+                   count(*) AS mutual_count,
+                   sum(LEAST(c1.events_together, c2.events_together)) AS score
+            FROM co_attendance c1
+            JOIN co_attendance c2 ON c2.user_id = c1.other_id
+            WHERE c1.user_id = ANY(:users)
+              AND c2.other_id <> c1.user_id
+              AND NOT EXISTS (
+                  SELECT 1 FROM co_attendance d WHERE d.user_id = c1.user_id AND d.other_id = c2.other_id
+              )
+            GROUP BY c1.user_id, c2.other_id
+        ) s
+    ) ranked
+    WHERE rn <= :k
+""")
+
+
+def mark_dirty(db: Session, user_ids: list[int]) -> None:
+    """Ставит в очередь пользователей и их прямые контакты. В транзакции вызывающего."""
+    if user_ids:
+        db.execute(_MARK_DIRTY_SQL, {"users": list(user_ids)})
+
+
+def refresh_suggestions(
+    session: Session | None = None,
+    batch_size: int = 100,
+    top_k: int = TOP_K,
+) -> int:
+    """Разбирает очередь suggestion_dirty. Возвращает число пересчитанных пользователей."""
+    own_session = False
+    if session is None:
+        session = SessionLocal()
+        own_session = True
+
+    done = 0
+    try:
+        while True:
+            users = list(session.scalars(_TAKE_DIRTY_SQL, {"n": batch_size}))
+            if not users:
+                break
+            params = {"users": users, "k": top_k}
+            session.execute(_CLEAR_SQL, params)
+            session.execute(_FILL_SQL, params)
+            session.commit()
+            done += len(users)
+            if len(users) < batch_size:
+                break
+        return done
+    finally:
+        if own_session:
+            session.close()
@@ -1,4 +1,5 @@
 import hashlib, hmac, json
+from functools import lru_cache
 from urllib.parse import parse_qsl, unquote_plus
 from datetime import datetime, timezone, timedelta
 
@@ -10,7 +11,9 @@ def _build_dcs(pairs: list[tuple[str, str]]) -> str:
     filtered.sort(key=lambda kv: kv[0])
     return "\n".join(f"{k}={v}" for k, v in filtered)
 
+@lru_cache(maxsize=4)
 def _derive_secret_key(bot_token: str) -> bytes:
+    # ключ зависит только от токена бота — считаем один раз на процесс
     return hmac.new(b"WebAppData", bot_token.encode("utf_8"), hashlib.sha256).digest()
 
 def _hmac_hex(key: bytes, msg: str) -> str:
@@ -0,0 +1,195 @@
+"""
+Приём загрузки изображения одним потоковым проходом.
+
+Тело multipart разбирается по мере прихода (request.stream()), без промежуточного спула Starlette:
+- лимит размера проверяется на каждом чанке — слишком большой файл обрывается сразу;
+- sha256 и размер считаются на лету;
+- реальный тип берётся из magic bytes первых байт, а не из имени/Content-Type клиента;
+- запись во временный файл идёт в threadpool, event loop не блокируется.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import BinaryIO
+
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+SNIFF_BYTES = 16
+
+class UploadError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+@dataclass
+class ReceivedFile:
+    path: str
+    filename: str
+    size: int
+    sha256: str
+    ext: str
+    content_type: str
+
+    def discard(self) -> None:
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def sniff_image(head: bytes) -> tuple[str, str] | None:
+    """(расширение, content-type) по сигнатуре файла; None — не поддерживаемое изображение."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return ".jpg", "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return ".png", "image/png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return ".webp", "image/webp"
+    return None
+
+
+class _FilePart:
+    """
+    Приёмник данных файлового поля: временный файл + хэш + лимит.
+    Создаётся из колбэка парсера на event loop, поэтому файл открывается лениво —
+    в write/close, которые вызываются через threadpool.
+    """
+
+    def __init__(self, filename: str, max_bytes: int):
+        self.filename = filename
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.head = b""
+        self.hash = hashlib.sha256()
+        self.path = ""
+        self.out: BinaryIO | None = None
+
+    def _open(self) -> BinaryIO:
+        if self.out is None:
+            fd, self.path = tempfile.mkstemp(prefix="upload-")
+            self.out = os.fdopen(fd, "wb")
+        return self.out
+
+    def write(self, pieces: list[bytes]) -> None:
+        out = self._open()
+        for data in pieces:
+            out.write(data)
+
+    def close(self) -> None:
+        self._open().close()
+
+    def discard(self) -> None:
+        if self.out is not None:
+            self.out.close()
+        if self.path:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+
+async def receive_image(request: Request, field: str, max_bytes: int) -> ReceivedFile:
+    """Разбирает multipart-тело и возвращает файл из поля field. Ошибки — UploadError(status, detail)."""
+    content_type = request.headers.get("content-type", "")
+    ctype, params = parse_options_header(content_type)
+    if ctype != b"multipart/form-data" or b"boundary" not in params:
+        raise UploadError(400, "multipart/form-data expected")
+
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > max_bytes + 64 * 1024:
+        raise UploadError(413, "file too large")
+
+    state: dict = {"headers": {}, "name": b"", "value": b"", "part": None}
+    target: _FilePart | None = None
+    pending: list[bytes] = []
+
+    def on_part_begin() -> None:
+        state["headers"] = {}
+        state["part"] = None
+
+    def on_header_field(data: bytes, start: int, end: int) -> None:
+        state["name"] += data[start:end]
+
+    def on_header_value(data: bytes, start: int, end: int) -> None:
+        state["value"] += data[start:end]
+
+    def on_header_end() -> None:
+        state["headers"][state["name"].lower()] = state["value"]
+        state["name"] = state["value"] = b""
+
+    def on_headers_finished() -> None:
+        nonlocal target
+        _, options = parse_options_header(state["headers"].get(b"content-disposition", b""))
+        if options.get(b"name", b"").decode("latin-1") != field or b"filename" not in options:
+            return
+        if target is not None:
+            raise UploadError(400, "only one file is allowed")
+        target = _FilePart(options[b"filename"].decode("utf-8", "replace"), max_bytes)
+        state["part"] = target
+
+    def on_part_data(data: bytes, start: int, end: int) -> None:
+        part = state["part"]
+        if part is None:
+            return
+        piece = data[start:end]
+        part.size += len(piece)
+        if part.size > part.max_bytes:
+            raise UploadError(413, "file too large")
+        if len(part.head) < SNIFF_BYTES:
+            part.head += piece[: SNIFF_BYTES - len(part.head)]
+        part.hash.update(piece)
+        pending.append(piece)
+
+    def on_part_end() -> None:
+        state["part"] = None
+
+    parser = MultipartParser(params[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+    })
+
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            if pending and target is not None:
+                pieces, pending[:] = list(pending), []
+                await run_in_threadpool(target.write, pieces)
+        parser.finalize()
+    except UploadError:
+        if target is not None:
+            await run_in_threadpool(target.discard)
+        raise
+    except Exception:
+        if target is not None:
+            await run_in_threadpool(target.discard)
+        raise UploadError(400, "malformed multipart body")
+
+    if target is None:
+        raise UploadError(400, f"field '{field}' with a file is required")
+    await run_in_threadpool(target.close)
+
+    sniffed = sniff_image(target.head)
+    if sniffed is None:
+        await run_in_threadpool(target.discard)
+        raise UploadError(415, "only jpeg, png and webp images are allowed")
+    ext, real_type = sniffed
+    return ReceivedFile(
+        path=target.path,
+        filename=target.filename,
+        size=target.size,
+        sha256=target.hash.hexdigest(),
+        ext=ext,
+        content_type=real_type,
+    )
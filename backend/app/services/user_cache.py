@@ -0,0 +1,63 @@
+"""
+Кэш «кто делает запрос»: user:{id} -> {id, role, gender}.
+
+Большинству ручек от пользователя нужны только id, роль и пол — get_current_identity берёт их
+отсюда и не трогает БД. Запись сбрасывается при смене роли/пола/города и при логине; TTL
+(settings.user_cache_ttl_seconds) ограничивает устаревание в локальном кэше соседних воркеров.
+
+Сброс с MemoryCache действует только в своём процессе, поэтому решения по роли и полу
+(создание события, отказ в join) берут fresh_identity — прямо из БД.
+"""
+from dataclasses import dataclass
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.user import User, UserGender, UserRole
+from app.services.cache import get_cache
+
+
+@dataclass(frozen=True)
+class CurrentIdentity:
+    id: int
+    role: UserRole
+    gender: UserGender
+
+
+def _user_key(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def identity_of(user: User) -> CurrentIdentity:
+    return CurrentIdentity(id=user.id, role=user.role, gender=user.gender)
+
+
+def remember_identity(identity: CurrentIdentity) -> None:
+    get_cache().set(
+        _user_key(identity.id),
+        {"id": identity.id, "role": identity.role.value, "gender": identity.gender.value},
+        ttl=settings.user_cache_ttl_seconds,
+    )
+
+
+def load_identity(db: Session, user_id: int) -> CurrentIdentity | None:
+    """Из кэша; при промахе — одна узкая выборка (id, role, gender) и запись в кэш."""
+    cached = get_cache().get(_user_key(user_id))
+    if cached is not None:
+        return CurrentIdentity(id=cached["id"], role=UserRole(cached["role"]), gender=UserGender(cached["gender"]))
+    return fresh_identity(db, user_id)
+
+
+def fresh_identity(db: Session, user_id: int) -> CurrentIdentity | None:
+    """Мимо кэша: узкая выборка из БД, результат обновляет кэш своего воркера."""
+    row = db.execute(select(User.id, User.role, User.gender).where(User.id == user_id)).first()
+    if row is None:
+        return None
+    identity = CurrentIdentity(id=row.id, role=row.role, gender=row.gender)
+    remember_identity(identity)
+    return identity
+
+
+def invalidate_user(user_id: int) -> None:
+    get_cache().delete(_user_key(user_id))
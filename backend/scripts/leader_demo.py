@@ -0,0 +1,76 @@
+"""
+Проверка выбора лидера несколькими процессами на одной БД.
+
+    export $(grep -v '^#' .env | xargs)
+    python scripts/leader_demo.py --workers 3 --kill-after 10
+
+Каждый процесс опрашивает lock и печатает смену роли. Через --kill-after секунд
+лидер убивается (SIGKILL, без release) — один из оставшихся должен стать лидером
+на следующем опросе.
+"""
+import argparse
+import multiprocessing as mp
+import os
+import signal
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sqlalchemy as sa  # noqa: E402
+
+from app.services.leader import LeaderElection  # noqa: E402
+
+
+def worker(url: str, poll: float, leaders: mp.Queue) -> None:
+    engine = sa.create_engine(url, pool_pre_ping=True)
+    election = LeaderElection(engine, on_elected=lambda: leaders.put(os.getpid()))
+    was = None
+    while True:
+        now = election.poll()
+        if now != was:
+            print(f"[{election.worker_id}] {'LEADER' if now else 'follower'}", flush=True)
+            was = now
+        time.sleep(poll)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workers", type=int, default=3)
+    ap.add_argument("--poll", type=float, default=1.0)
+    ap.add_argument("--kill-after", type=float, default=10.0)
+    ap.add_argument("--duration", type=float, default=20.0)
+    args = ap.parse_args()
+
+    url = os.environ["DATABASE_URL"]
+    leaders: mp.Queue = mp.Queue()
+    procs = [mp.Process(target=worker, args=(url, args.poll, leaders), daemon=True) for _ in range(args.workers)]
+    for p in procs:
+        p.start()
+
+    started = time.monotonic()
+    killed = False
+    elected: list[int] = []
+    try:
+        while time.monotonic() - started < args.duration:
+            while not leaders.empty():
+                elected.append(leaders.get())
+            if not killed and elected and time.monotonic() - started >= args.kill_after:
+                print(f"--- killing leader pid={elected[-1]}", flush=True)
+                os.kill(elected[-1], signal.SIGKILL)
+                killed = True
+            time.sleep(0.2)
+    finally:
+        for p in procs:
+            if p.is_alive():
+                p.terminate()
+
+    print(f"elections: {elected}")
+    if len(set(elected)) != len(elected):
+        sys.exit("same worker elected twice")
+    if killed and len(elected) < 2:
+        sys.exit("no failover after leader was killed")
+
+
+if __name__ == "__main__":
+    main()
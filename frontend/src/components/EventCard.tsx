@@ -77,8 +77,9 @@ export default function EventCard({
         >
           {event.photo_url ? (
             <img
-              src={event.photo_url}
+              src={event.photo_variants?.card ?? event.photo_url}
               alt=""
+              loading="lazy"
               width={100}
               height={100}
               style={{ objectFit: "cover", width: "100%", height: "100%" }}
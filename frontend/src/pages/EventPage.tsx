@@ -21,6 +21,7 @@ type EventOut = {
   participants_count: number;
   is_user_joined: boolean;
   photo_url?: string | null;
+  photo_variants?: { card: string; detail: string; original: string } | null;
 };
 
 export default function EventPage() {
@@ -109,7 +110,7 @@ export default function EventPage() {
       {data.photo_url ? (
         <div className="event-hero" style={{ marginTop: "2rem" }}>
           <img
-            src={data.photo_url}
+            src={data.photo_variants?.detail ?? data.photo_url}
             alt=""
             style={{ width: "100%", height: "100%", objectFit: "cover" }}
           />
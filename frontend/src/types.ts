@@ -20,6 +20,7 @@ export type EventCardOut = {
   participants_count: number;
   is_user_joined: boolean;
   photo_url?: string | null;
+  photo_variants?: { card: string; detail: string; original: string } | null;
   status: "open" | "closed" | "past";
   max_participants: number | null;
 };